@@ -0,0 +1,198 @@
+"""
+Module for breaking many ciphertext files in one process
+The n-gram tables are loaded once and shared with a pool of worker processes,
+ results are written as JSON Lines as soon as each file is broken
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(SRC_DIR, directory) for directory in ('common', 'mono', 'vigenere')]
+# pylint: disable=wrong-import-position
+from cli import collect_files
+from ngram_model import NGramModel, ENGLISH_FILES, model_files
+from reader import read_ascii_from_file
+from stopping import StopCondition, CONFIDENT_SCORE
+from classify import classify, UNKNOWN
+from result_cache import ResultCache, CACHE_FILE
+from worker_pool import process_pool, worker_state
+import break_mono
+import break_vig
+
+CIPHERS = ('mono', 'vigenere', 'auto')
+# Jobs queued per worker, so huge batches are never submitted at once
+QUEUED_JOBS_PER_WORKER = 4
+
+class BatchBreaker:
+    """
+    Holds the breakers of both ciphers, loaded once for a whole batch
+    Both breakers share one n-gram model, by default the english model, and the
+     optional ResultCache "result_cache" of all worker processes. Like
+     break_vig.py, the english model refines vigenere keys with the full
+     quadgram file instead of the trimmed one of the monoalphabetic breaker.
+    """
+
+    def __init__(self, restarts=break_mono.RESTARTS, solver='hill', seed=None,
+                 key_length=None, matrix=False, refine=False,
+                 model=None, result_cache=None):  # pylint: disable=too-many-arguments
+        vigenere_model = model
+        if model is None:
+            model = NGramModel.load()
+            vigenere_model = NGramModel.load({**ENGLISH_FILES, 4: break_vig.QUADGRAM_FILE}) \
+                if refine else model
+        self.mono_breaker = break_mono.MonoBreaker.from_model(model)
+        self.vigenere_breaker = break_vig.VigenereBreaker.from_model(
+            vigenere_model, key_length, matrix, refine)
+        self.mono_breaker.result_cache = result_cache
+        self.vigenere_breaker.result_cache = result_cache
+        self.restarts = restarts
+        self.solver = break_mono.SOLVERS[solver]()
+        self.seed = seed
+        self.key_length = key_length
+
+    def break_text(self, text, cipher, period=None, time_limit=None):
+        """
+        Breaks a text of the given cipher type
+        A vigenere period, e.g. found by classify, overrides the key length option
+        Monoalphabetic breaks stop after "time_limit" seconds with the best key
+         found so far, vigenere breaks take too little time to need a limit
+        Returns the key and its score
+        """
+        if cipher == 'mono':
+            # Restarts run one after another, the pool parallelizes over files
+            return self.mono_breaker.break_mono_multi(
+                text, self.restarts, 1, self.seed, self.solver,
+                StopCondition(time_limit=time_limit, score_threshold=CONFIDENT_SCORE))
+
+        breaker = self.vigenere_breaker
+        if period or self.key_length:
+            key = breaker.break_vigenere(text, period)
+        else:
+            key = breaker.break_vigenere_auto(text, workers=1)
+        return (key, breaker.score_key(text, key))
+
+    def break_record(self, text, cipher, record=None, time_limit=None):
+        """
+        Breaks a text, the cipher 'auto' classifies it first
+        Returns the result record, "record" extended with the cipher, period,
+         key and score, or an error message instead of a key
+        """
+        record = record if record is not None else {}
+        record['cipher'] = cipher
+        period = None
+        if cipher == 'auto':
+            cipher, period, _ = classify(text)
+            record['cipher'], record['period'] = cipher, period
+        if cipher == UNKNOWN:
+            record['error'] = 'unknown cipher'
+        else:
+            record['key'], record['score'] = self.break_text(text, cipher, period, time_limit)
+        return record
+
+    def break_file(self, file, cipher):
+        """
+        Breaks a ciphertext file, the cipher 'auto' classifies it first
+        Returns the result record, with an error message instead of a key on failure
+        """
+        start = time.perf_counter()
+        record = {'file': file, 'cipher': cipher}
+        try:
+            self.break_record(read_ascii_from_file(file), cipher, record)
+        except Exception as error:  # pylint: disable=broad-except
+            record['error'] = str(error)
+        record['elapsed'] = round(time.perf_counter() - start, 6)
+        return record
+
+    def run(self, files, cipher, out, workers=None):
+        """
+        Breaks all files on a pool of "workers" processes and writes one JSON
+         line per file to the text stream "out", in order of completion
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if workers == 1:
+            for file in files:
+                _write_record(out, self.break_file(file, cipher))
+            return
+
+        with process_pool(workers, self) as pool:
+            files = iter(files)
+            pending = set()
+            while True:
+                for file in files:
+                    pending.add(pool.submit(_run_job, file, cipher))
+                    if len(pending) >= workers * QUEUED_JOBS_PER_WORKER:
+                        break
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _write_record(out, future.result())
+
+
+def _run_job(file, cipher):
+    """
+    Breaks a single file in a worker process, whose pool state is the batch breaker
+    """
+    return worker_state().break_file(file, cipher)
+
+
+def _write_record(out, record):
+    """
+    Writes a result record as one JSON line and flushes it immediately
+    """
+    out.write(json.dumps(record) + '\n')
+    out.flush()
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser()
+    PARSER.add_argument('inputs', metavar='INPUT', nargs='*',
+                        help='Input files, directories or glob patterns.')
+    PARSER.add_argument('--manifest', '-m',
+                        help='A file listing one input file per line, - for stdin.')
+    PARSER.add_argument('--cipher', '-c', choices=CIPHERS, required=True,
+                        help='The cipher of the input files, auto classifies every file.')
+    PARSER.add_argument('--out', '-o',
+                        help='The JSON Lines output file.')
+    PARSER.add_argument('--workers', '-w', type=int,
+                        help='The amount of worker processes. Defaults to the CPU count.')
+    PARSER.add_argument('--restarts', '-r', type=int, default=break_mono.RESTARTS,
+                        help='The amount of restarts per monoalphabetic ciphertext.')
+    PARSER.add_argument('--solver', choices=break_mono.SOLVERS, default='hill',
+                        help='The monoalphabetic key search strategy.')
+    PARSER.add_argument('--seed', '-s', type=int,
+                        help='The random seed, for reproducible results.')
+    PARSER.add_argument('--keylen', '-k', type=int,
+                        help='The vigenere key length. Estimated per file if not given.')
+    PARSER.add_argument('--matrix', action='store_true',
+                        help='Score vigenere key bigrams with a matrix product, requires NumPy.')
+    PARSER.add_argument('--refine', action='store_true',
+                        help='Refine vigenere keys with quadgram analysis.')
+    PARSER.add_argument('--model',
+                        help='The prefix of the frequency files of another language, '
+                        'as written by build_model.py.')
+    PARSER.add_argument('--cache', nargs='?', const=CACHE_FILE,
+                        help='Reuse the results of earlier runs stored in this SQLite file.')
+
+    ARGS = vars(PARSER.parse_args())
+    if not ARGS['inputs'] and not ARGS['manifest']:
+        PARSER.error('no INPUT or --manifest given')
+
+    BATCH = BatchBreaker(ARGS['restarts'], ARGS['solver'], ARGS['seed'],
+                         ARGS['keylen'], ARGS['matrix'], ARGS['refine'],
+                         NGramModel.load(model_files(ARGS['model'])) if ARGS['model'] else None,
+                         ResultCache(ARGS['cache']) if ARGS['cache'] else None)
+    FILES = collect_files(ARGS['inputs'], ARGS['manifest'])
+
+    if ARGS['out']:
+        with open(ARGS['out'], 'w') as FILE:
+            BATCH.run(FILES, ARGS['cipher'], FILE, ARGS['workers'])
+    else:
+        BATCH.run(FILES, ARGS['cipher'], sys.stdout, ARGS['workers'])
@@ -0,0 +1,368 @@
+"""
+Module for benchmarking the breakers offline
+Ciphertexts are generated from the example plaintexts with fixed seeds, so runs
+ on different versions of the code break exactly the same texts
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import sys
+import time
+import tracemalloc
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(SRC_DIR, directory) for directory in ('common', 'mono', 'vigenere')]
+# pylint: disable=wrong-import-position
+from instrumentation import Stats
+from reader import read_ascii_from_file
+from scorer import IncrementalScorer, ScoreCache
+from stopping import StopCondition, CONFIDENT_SCORE
+from mono import Mono
+from vig import Vigenere
+import break_mono
+import break_vig
+
+EXAMPLE_FILES = [os.path.join(SRC_DIR, '../examples', name)
+                 for name in ('mono.plaintext', 'vig.plaintext')]
+MONO_LENGTHS = (100, 200, 400, 800)
+VIGENERE_LENGTHS = (200, 500, 1000)
+VIGENERE_KEY_LENGTHS = (3, 7, 12)
+TRIALS = 10
+# Ciphertexts per configuration checked against the reference implementations,
+#  the reference bigram analysis takes about a second per ciphertext
+CHECK_TRIALS = 3
+# Random swaps and reverts per ciphertext checked against the reference scorer
+CHECK_SWAPS = 100
+# A run regresses if its success rate drops by more than this
+SUCCESS_TOLERANCE = 0.05
+# A run regresses if its median time grows by more than this fraction
+TIME_TOLERANCE = 0.2
+
+
+class Benchmark:
+    """
+    Breaks generated ciphertexts of every configuration and measures the results
+    """
+
+    def __init__(self, trials=TRIALS, seed=0, solver='hill', restarts=break_mono.RESTARTS,
+                 matrix=False, refine=False):  # pylint: disable=too-many-arguments
+        self.trials = trials
+        self.seed = seed
+        self.solver = solver
+        self.restarts = restarts
+        self.matrix = matrix
+        self.refine = refine
+        self.corpus = ''.join(read_ascii_from_file(file) for file in EXAMPLE_FILES)
+        self.mono_breaker = None
+        self.vigenere_breaker = None
+
+    def cases(self, cipher, length, key_length=None):
+        """
+        Returns the (plaintext, key, ciphertext) triples of a configuration
+        Every triple is derived from its own seed, so adding configurations or
+         trials does not change the existing ones
+        """
+        cases = []
+        for trial in range(self.trials):
+            rng = random.Random(f'{self.seed}:{cipher}:{length}:{key_length}:{trial}')
+            start = rng.randrange(len(self.corpus) - length + 1)
+            plaintext = self.corpus[start:start + length]
+            if cipher == 'mono':
+                key = ''.join(rng.sample(string.ascii_lowercase, 26))
+                cases.append((plaintext, key, Mono.encrypt(plaintext, key)))
+            else:
+                key = ''.join(rng.choice(string.ascii_lowercase) for _ in range(key_length))
+                cases.append((plaintext, key, Vigenere.encrypt(plaintext, key)))
+        return cases
+
+    def configurations(self, ciphers, mono_lengths, vigenere_lengths, key_lengths):
+        """
+        Yields the (cipher, length, key length) triples to measure
+        """
+        if 'mono' in ciphers:
+            for length in mono_lengths:
+                yield ('mono', length, None)
+        if 'vigenere' in ciphers:
+            for length in vigenere_lengths:
+                for key_length in key_lengths:
+                    yield ('vigenere', length, key_length)
+
+    def run(self, configurations, log=None):
+        """
+        Measures every configuration
+        Returns the results together with the settings of the benchmark
+        """
+        results = []
+        for cipher, length, key_length in configurations:
+            if length > len(self.corpus):
+                raise ValueError(f'length {length} exceeds the example corpus '
+                                 f'of {len(self.corpus)} letters')
+            results.append(self.measure(cipher, length, key_length))
+            if log:
+                log.write(json.dumps(results[-1]) + '\n')
+                log.flush()
+        return {
+            'settings': {'trials': self.trials, 'seed': self.seed, 'solver': self.solver,
+                         'restarts': self.restarts, 'matrix': self.matrix,
+                         'refine': self.refine},
+            'python': platform.python_version(),
+            'results': results,
+        }
+
+    def measure(self, cipher, length, key_length=None):
+        """
+        Breaks all trials of a configuration
+        Wall time and evaluations are measured on every trial, the peak memory on
+         an extra run of the first trial with tracemalloc, which slows it down
+        """
+        cases = self.cases(cipher, length, key_length)
+        times = []
+        successes = 0
+        evaluations = 0
+        for trial, (plaintext, _, ciphertext) in enumerate(cases):
+            before = self._evaluations(cipher)
+            start = time.perf_counter()
+            deciphered = self._break(cipher, ciphertext, key_length, trial)
+            times.append(time.perf_counter() - start)
+            evaluations += self._evaluations(cipher) - before
+            successes += deciphered == plaintext
+
+        tracemalloc.start()
+        self._break(cipher, cases[0][2], key_length, 0)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'cipher': cipher,
+            'length': length,
+            'key_length': key_length,
+            'trials': len(cases),
+            'success_rate': successes / len(cases),
+            'median_time': statistics.median(times),
+            'p95_time': _percentile(times, 95),
+            'evaluations_per_second': evaluations / sum(times) if sum(times) else 0.0,
+            'peak_memory': peak_memory,
+        }
+
+    def check(self, mono_lengths=MONO_LENGTHS, vigenere_lengths=VIGENERE_LENGTHS,
+              key_lengths=VIGENERE_KEY_LENGTHS):
+        """
+        Checks the fast scoring engines against the reference implementations
+         kept in the breakers, on the ciphertexts of the benchmark
+        Returns a list of messages, one per mismatch
+        """
+        mismatches = []
+        for length in mono_lengths:
+            for trial, (_, key, ciphertext) in enumerate(self.cases('mono', length)):
+                mismatches += self._check_incremental_scorer(ciphertext, key, trial)
+        for length in vigenere_lengths:
+            for key_length in key_lengths:
+                for trial, (_, _, ciphertext) in enumerate(
+                        self.cases('vigenere', length, key_length)):
+                    mismatches += self._check_bigram_matrix(ciphertext, key_length, trial)
+        return mismatches
+
+    def _check_incremental_scorer(self, ciphertext, key, trial):
+        """
+        Applies random swaps and reverts to an IncrementalScorer with a score
+         cache, and compares its score after every step with the reference
+         _score of the deciphered text
+        """
+        # pylint: disable=protected-access
+        breaker = self._mono_breaker()
+        rng = random.Random(f'{self.seed}:check:{len(ciphertext)}:{trial}')
+        scorer = IncrementalScorer(breaker.n_gram_table, ciphertext, key, ScoreCache())
+        for step in range(CHECK_SWAPS + 1):
+            expected = breaker._score(Mono.decrypt(ciphertext, scorer.get_key()))
+            if scorer.score != expected:
+                return [f'IncrementalScorer length {len(ciphertext)} trial {trial} step {step}: '
+                        f'score {scorer.score}, reference {expected}']
+            scorer.swap(rng.randint(0, 25), rng.randint(0, 25))
+            if rng.random() < 0.5:
+                scorer.revert()
+        return []
+
+    def _check_bigram_matrix(self, ciphertext, key_length, trial):
+        """
+        Compares the best key bigrams and fitnesses of the NumPy matrix engine
+         with the reference implementation translating the bigram lists
+        """
+        # pylint: disable=protected-access
+        breaker = self._vigenere_breaker()
+        expected = breaker._best_pairs(ciphertext, key_length)
+        pairs = breaker._best_pairs_matrix(ciphertext, key_length)
+        if pairs != expected:
+            return [f'BigramMatrix length {len(ciphertext)} key length {key_length} '
+                    f'trial {trial}: {pairs}, reference {expected}']
+        return []
+
+    def _mono_breaker(self):
+        """
+        Returns the monoalphabetic breaker, loaded on first use
+        """
+        if self.mono_breaker is None:
+            self.mono_breaker = break_mono.MonoBreaker.from_data_files(
+                break_mono.MONOGRAM_FILE, break_mono.N_GRAM_FILE, Stats())
+        return self.mono_breaker
+
+    def _vigenere_breaker(self):
+        """
+        Returns the vigenere breaker, loaded on first use
+        """
+        if self.vigenere_breaker is None:
+            self.vigenere_breaker = break_vig.VigenereBreaker(
+                None, break_vig.MONOGRAM_FILE, break_vig.BIGRAM_FILE, self.matrix,
+                break_vig.QUADGRAM_FILE if self.refine else None, Stats())
+        return self.vigenere_breaker
+
+    def _break(self, cipher, ciphertext, key_length, trial):
+        """
+        Breaks a ciphertext like the command line tools do
+        Returns the deciphered text
+        """
+        if cipher == 'mono':
+            key, _ = self._mono_breaker().break_mono_multi(
+                ciphertext, self.restarts, 1, self.seed + trial,
+                break_mono.SOLVERS[self.solver](), StopCondition(score_threshold=CONFIDENT_SCORE))
+            return Mono.decrypt(ciphertext, key)
+
+        key = self._vigenere_breaker().break_vigenere(ciphertext, key_length)
+        return Vigenere.decrypt(ciphertext, key)
+
+    def _evaluations(self, cipher):
+        """
+        Returns the amount of scored keys of the breaker of the cipher so far
+        """
+        breaker = self.mono_breaker if cipher == 'mono' else self.vigenere_breaker
+        return breaker.stats.counters['evaluations'] if breaker else 0
+
+
+def _percentile(values, percent):
+    """
+    Returns the percentile of the values, interpolating between the closest ranks
+    """
+    values = sorted(values)
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def compare(baseline, current, success_tolerance=SUCCESS_TOLERANCE,
+            time_tolerance=TIME_TOLERANCE):
+    """
+    Compares two benchmark runs configuration by configuration
+    Returns a list of messages, one per regression: a success rate dropping by
+     more than "success_tolerance", or a median time growing by more than the
+     fraction "time_tolerance"
+    """
+    def configuration(result):
+        return (result['cipher'], result['length'], result['key_length'])
+
+    baseline_results = {configuration(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = baseline_results.get(configuration(result))
+        if old is None:
+            continue
+        name = '{} length {}'.format(result['cipher'], result['length'])
+        if result['key_length']:
+            name += ' key length {}'.format(result['key_length'])
+
+        if result['success_rate'] < old['success_rate'] - success_tolerance:
+            regressions.append('{}: success rate {:.0%} -> {:.0%}'.format(
+                name, old['success_rate'], result['success_rate']))
+        if result['median_time'] > old['median_time'] * (1 + time_tolerance):
+            regressions.append('{}: median time {:.3f}s -> {:.3f}s'.format(
+                name, old['median_time'], result['median_time']))
+    return regressions
+
+
+def _int_list(value):
+    """
+    Parses a comma separated list of integers
+    """
+    return [int(item) for item in value.split(',') if item]
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser()
+    SUBPARSERS = PARSER.add_subparsers(dest='command', required=True)
+
+    RUN_PARSER = SUBPARSERS.add_parser('run', help='Run the benchmark.')
+    RUN_PARSER.add_argument('--out', '-o',
+                            help='The JSON output file. Defaults to stdout.')
+    RUN_PARSER.add_argument('--cipher', '-c', choices=('mono', 'vigenere'), action='append',
+                            help='The ciphers to benchmark, may be repeated. Defaults to both.')
+    RUN_PARSER.add_argument('--lengths', type=_int_list,
+                            help='Comma separated ciphertext lengths, for both ciphers.')
+    RUN_PARSER.add_argument('--keylens', type=_int_list, default=VIGENERE_KEY_LENGTHS,
+                            help='Comma separated vigenere key lengths.')
+    RUN_PARSER.add_argument('--trials', '-n', type=int, default=TRIALS,
+                            help='The amount of ciphertexts per configuration.')
+    RUN_PARSER.add_argument('--seed', '-s', type=int, default=0,
+                            help='The seed of the generated ciphertexts and the breakers.')
+    RUN_PARSER.add_argument('--solver', choices=break_mono.SOLVERS, default='hill',
+                            help='The monoalphabetic key search strategy.')
+    RUN_PARSER.add_argument('--restarts', '-r', type=int, default=break_mono.RESTARTS,
+                            help='The amount of restarts per monoalphabetic ciphertext.')
+    RUN_PARSER.add_argument('--matrix', action='store_true',
+                            help='Score vigenere key bigrams with a matrix product, '
+                            'requires NumPy.')
+    RUN_PARSER.add_argument('--refine', action='store_true',
+                            help='Refine vigenere keys with quadgram analysis.')
+
+    COMPARE_PARSER = SUBPARSERS.add_parser('compare', help='Compare two benchmark runs.')
+    COMPARE_PARSER.add_argument('baseline', metavar='BASELINE',
+                                help='The JSON output of the earlier run.')
+    COMPARE_PARSER.add_argument('current', metavar='CURRENT',
+                                help='The JSON output of the later run.')
+    COMPARE_PARSER.add_argument('--success-tolerance', type=float, default=SUCCESS_TOLERANCE,
+                                help='Allowed drop of the success rate.')
+    COMPARE_PARSER.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE,
+                                help='Allowed growth of the median time, as a fraction.')
+
+    CHECK_PARSER = SUBPARSERS.add_parser(
+        'check', help='Check the fast scoring engines against the reference implementations.')
+    CHECK_PARSER.add_argument('--trials', '-n', type=int, default=CHECK_TRIALS,
+                              help='The amount of ciphertexts per configuration.')
+    CHECK_PARSER.add_argument('--seed', '-s', type=int, default=0,
+                              help='The seed of the generated ciphertexts.')
+
+    ARGS = vars(PARSER.parse_args())
+
+    if ARGS['command'] == 'check':
+        MISMATCHES = Benchmark(ARGS['trials'], ARGS['seed']).check()
+        for MISMATCH in MISMATCHES:
+            print(MISMATCH)
+        sys.exit(1 if MISMATCHES else 0)
+
+    if ARGS['command'] == 'compare':
+        with open(ARGS['baseline'], 'r') as FILE:
+            BASELINE = json.load(FILE)
+        with open(ARGS['current'], 'r') as FILE:
+            CURRENT = json.load(FILE)
+        REGRESSIONS = compare(BASELINE, CURRENT, ARGS['success_tolerance'],
+                              ARGS['time_tolerance'])
+        for REGRESSION in REGRESSIONS:
+            print(REGRESSION)
+        sys.exit(1 if REGRESSIONS else 0)
+
+    BENCHMARK = Benchmark(ARGS['trials'], ARGS['seed'], ARGS['solver'], ARGS['restarts'],
+                          ARGS['matrix'], ARGS['refine'])
+    CONFIGURATIONS = BENCHMARK.configurations(
+        ARGS['cipher'] or ('mono', 'vigenere'), ARGS['lengths'] or MONO_LENGTHS,
+        ARGS['lengths'] or VIGENERE_LENGTHS, ARGS['keylens'])
+    # Progress goes to stderr, one line per configuration
+    RESULT = BENCHMARK.run(CONFIGURATIONS, sys.stderr)
+
+    if ARGS['out']:
+        with open(ARGS['out'], 'w') as FILE:
+            json.dump(RESULT, FILE, indent=2)
+    else:
+        print(json.dumps(RESULT, indent=2))
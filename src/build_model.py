@@ -0,0 +1,146 @@
+"""
+Module for building n-gram models from text corpora
+The 1- to 4-grams of the corpus are counted in a single pass over it into dense
+ count arrays, so memory use does not depend on the corpus size. Requires NumPy
+"""
+
+import argparse
+import os
+import sys
+import unicodedata
+import numpy as np
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(SRC_DIR, directory) for directory in ('common', 'mono', 'vigenere')]
+# pylint: disable=wrong-import-position
+from cli import collect_files
+from ngram_model import NGramModel, ORDERS, model_files
+from reader import CHUNK_SIZE, letter_codes
+
+# Ligatures and letters whose accents unicode does not decompose, other letters
+#  only lose their accents
+LIGATURES = {'ß': 'ss', 'æ': 'ae', 'Æ': 'AE', 'œ': 'oe', 'Œ': 'OE',
+             'ø': 'o', 'Ø': 'O', 'ł': 'l', 'Ł': 'L', 'đ': 'd', 'Đ': 'D'}
+# German umlauts, folded to single letters unless digraphs are requested
+DIGRAPHS = {'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'Ä': 'AE', 'Ö': 'OE', 'Ü': 'UE'}
+
+
+class NGramCounter:
+    """
+    Counts the n-grams of orders 1 to "max_order" into dense arrays of 26^order
+     counts, indexed like the dense tables of the breakers.
+    Text is added chunk by chunk as letter codes, n-grams spanning two chunks
+     are counted as well.
+    """
+
+    def __init__(self, max_order=max(ORDERS)):
+        self.counts = {order: np.zeros(26 ** order, dtype=np.int64)
+                       for order in range(1, max_order + 1)}
+        self.letters = 0
+        self._tail = np.zeros(0, dtype=np.uint8)
+
+    def add(self, codes):
+        """
+        Counts the n-grams ending in the bytes of letter codes 0..25
+        """
+        if not codes:
+            return
+        codes = np.concatenate((self._tail, np.frombuffer(codes, dtype=np.uint8)))
+        for order, counts in self.counts.items():
+            first = max(0, len(self._tail) - order + 1)
+            last = len(codes) - order
+            if last < first:
+                continue
+            index = np.zeros(last - first + 1, dtype=np.int64)
+            for offset in range(order):
+                index *= 26
+                index += codes[first + offset:last + offset + 1]
+            counts += np.bincount(index, minlength=len(counts))
+        self.letters += len(codes) - len(self._tail)
+        self._tail = codes[-(len(self.counts) - 1):].copy() if len(self.counts) > 1 \
+            else self._tail
+
+    def add_file(self, file, digraphs=False, chunk_size=CHUNK_SIZE):
+        """
+        Counts the n-grams of a UTF-8 text file, see fold for the letters counted
+        """
+        with open(file, 'r', encoding='utf-8', errors='ignore') as text_file:
+            while True:
+                chunk = text_file.read(chunk_size)
+                if not chunk:
+                    return
+                self.add(letter_codes(fold(chunk, digraphs)))
+
+
+def fold(text, digraphs=False):
+    """
+    Encodes text as ASCII bytes, writing ligatures and, with "digraphs" set,
+     german umlauts as two letters, and removing the accents of other letters.
+    Letters without an ASCII form are dropped.
+    """
+    if text.isascii():
+        return text.encode('ascii')
+    # str.replace per letter is much faster than str.translate with a dict
+    replacements = {**DIGRAPHS, **LIGATURES} if digraphs else LIGATURES
+    for letter, ascii_letters in replacements.items():
+        if letter in text:
+            text = text.replace(letter, ascii_letters)
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore')
+
+
+def write_frequency_file(counts, order, file, min_count=1):
+    """
+    Writes the n-grams counted at least "min_count" times as "NGRAM COUNT"
+     lines, like the english frequency files, most frequent first
+    """
+    indices = np.flatnonzero(counts >= max(1, min_count))
+    indices = indices[np.argsort(-counts[indices], kind='stable')]
+    with open(file, 'w', encoding='utf-8') as frequency_file:
+        for index, count in zip(indices.tolist(), counts[indices].tolist()):
+            n_gram = ''
+            for _ in range(order):
+                n_gram = chr(index % 26 + 65) + n_gram
+                index //= 26
+            frequency_file.write(f'{n_gram} {count}\n')
+
+
+def build_model(files, prefix, min_count=1, digraphs=False):
+    """
+    Counts the n-grams of all files and writes the frequency files of the model
+     PREFIX_monograms.txt to PREFIX_quadgrams.txt. N-grams of orders 2 to 4
+     counted less than "min_count" times are pruned, monograms are always kept.
+    Returns the model, loading it also builds the binary tables of the files
+    """
+    counter = NGramCounter()
+    for file in files:
+        counter.add_file(file, digraphs)
+    if not counter.letters:
+        raise ValueError('the corpus contains no letters')
+
+    output_files = model_files(prefix)
+    os.makedirs(os.path.dirname(os.path.abspath(prefix)), exist_ok=True)
+    for order, counts in counter.counts.items():
+        write_frequency_file(counts, order, output_files[order],
+                             min_count if order > 1 else 1)
+    return NGramModel.load(output_files)
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser()
+    PARSER.add_argument('inputs', metavar='INPUT', nargs='*',
+                        help='Corpus files, directories or glob patterns.')
+    PARSER.add_argument('--manifest', '-m',
+                        help='A file listing one corpus file per line, - for stdin.')
+    PARSER.add_argument('--out', '-o', required=True,
+                        help='The prefix of the frequency files, e.g. frequency_files/german.')
+    PARSER.add_argument('--min-count', type=int, default=1,
+                        help='Prune n-grams of order 2 to 4 counted less often.')
+    PARSER.add_argument('--digraphs', action='store_true',
+                        help='Write german umlauts as ae, oe and ue instead of a, o and u.')
+
+    ARGS = vars(PARSER.parse_args())
+    if not ARGS['inputs'] and not ARGS['manifest']:
+        PARSER.error('no INPUT or --manifest given')
+
+    build_model(collect_files(ARGS['inputs'], ARGS['manifest']), ARGS['out'],
+                ARGS['min_count'], ARGS['digraphs'])
@@ -0,0 +1,48 @@
+"""
+Command line interface of both ciphers
+    cipher.py {mono,vigenere} {encrypt,decrypt,break} [ARGUMENTS ...]
+Only the module of the chosen command is imported, so encrypting and decrypting
+ start without the breakers, their n-gram tables or NumPy. Input is read from
+ stdin and output written to stdout unless files are given.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(SRC_DIR, directory) for directory in ('common', 'mono', 'vigenere')]
+
+# Module implementing every command, by cipher
+COMMANDS = {
+    'mono': {'encrypt': 'mono', 'decrypt': 'mono', 'break': 'break_mono'},
+    'vigenere': {'encrypt': 'vig', 'decrypt': 'vig', 'break': 'break_vig'},
+}
+
+
+def main(argv=None):
+    """
+    Runs the command given on the command line "argv" with the remaining arguments
+    """
+    parser = argparse.ArgumentParser(
+        epilog='Run "%(prog)s CIPHER COMMAND -h" for the arguments of a command.')
+    parser.add_argument('cipher', choices=COMMANDS,
+                        help='The cipher.')
+    parser.add_argument('command', choices=COMMANDS['mono'],
+                        help='encrypt KEY or decrypt KEY a text, or break it.')
+    parser.add_argument('arguments', metavar='ARGUMENTS', nargs=argparse.REMAINDER,
+                        help='The arguments of the command.')
+
+    args = parser.parse_args(argv)
+
+    module = importlib.import_module(COMMANDS[args.cipher][args.command])
+    prog = f'{parser.prog} {args.cipher} {args.command}'
+    if args.command == 'break':
+        module.main(args.arguments, prog)
+    else:
+        module.main(args.arguments, prog, args.command)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Module for classifying ciphertexts as monoalphabetic or vigenere
+Uses the letter statistics of the text only, which is much cheaper than breaking it
+"""
+
+import argparse
+import json
+import os
+import sys
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(SRC_DIR, directory) for directory in ('common', 'mono', 'vigenere')]
+# pylint: disable=wrong-import-position
+from key_length import column_iocs, estimate_key_lengths, MAX_KEY_LENGTH
+from reader import read_ascii_from_file
+
+MONO = 'mono'
+VIGENERE = 'vigenere'
+UNKNOWN = 'unknown'
+# Index of coincidence above which text looks like a single substitution
+#  alphabet: english scores about 0.067, uniformly random text about 0.038
+LANGUAGE_IOC = 0.055
+# The column index of coincidence of monoalphabetic text fluctuates around the
+#  overall one by about PERIOD_MARGIN / sqrt(column length). A vigenere key with
+#  few distinct letters keeps the overall index high, but its columns clearly
+#  beat it at the period.
+PERIOD_MARGIN = 0.08
+PERIOD_CANDIDATES = 3
+MIN_LENGTH = 20
+
+
+def classify(text, max_key_length=MAX_KEY_LENGTH):
+    """
+    Classifies the ciphertext by its index of coincidence
+    Returns the cipher type and the probable period, which is 1 for
+     monoalphabetic and None for unknown texts, and the index of coincidence
+    - monoalphabetic ciphers keep the index of coincidence of english
+    - vigenere ciphers flatten it, but their columns keep it at the key period
+    - everything else is unknown
+    Short vigenere keys of few distinct letters flatten the index too little,
+     so a period whose columns clearly beat the overall index wins over mono.
+    """
+    if len(text) < MIN_LENGTH:
+        return (UNKNOWN, None, 0.0)
+
+    iocs = column_iocs(text, max_key_length)
+    ioc = iocs[1]
+    for period, _ in estimate_key_lengths(text, max_key_length, iocs)[:PERIOD_CANDIDATES]:
+        if period == 1:
+            continue
+        margin = PERIOD_MARGIN / (len(text) // period) ** 0.5 if ioc >= LANGUAGE_IOC else 0.0
+        if iocs[period] >= max(LANGUAGE_IOC, ioc + margin):
+            return (VIGENERE, period, ioc)
+    if ioc >= LANGUAGE_IOC:
+        return (MONO, 1, ioc)
+    return (UNKNOWN, None, ioc)
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser()
+    PARSER.add_argument('file', metavar='FILE',
+                        help='The input file.')
+    PARSER.add_argument('--break', '-b', dest='break_text', action='store_true',
+                        help='Also break the text with the matching breaker.')
+
+    ARGS = vars(PARSER.parse_args())
+
+    TEXT = read_ascii_from_file(ARGS['file'])
+    CIPHER, PERIOD, IOC = classify(TEXT)
+    RESULT = {'file': ARGS['file'], 'cipher': CIPHER, 'period': PERIOD, 'ioc': round(IOC, 5)}
+
+    if ARGS['break_text'] and CIPHER != UNKNOWN:
+        from batch import BatchBreaker  # pylint: disable=import-outside-toplevel
+        RESULT['key'], RESULT['score'] = BatchBreaker().break_text(TEXT, CIPHER, PERIOD)
+
+    print(json.dumps(RESULT))
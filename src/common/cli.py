@@ -0,0 +1,99 @@
+"""
+Module for the input and output of the command line scripts
+A file name of - stands for stdin or stdout, so the scripts can be used in pipes
+"""
+
+import argparse
+import contextlib
+import glob
+import os
+import sys
+
+STANDARD_STREAM = '-'
+
+
+def input_file(file):
+    """
+    Returns the file name, or the binary stdin for - and None, as accepted by
+     the readers
+    """
+    if file in (None, STANDARD_STREAM):
+        return sys.stdin.buffer
+    return file
+
+
+@contextlib.contextmanager
+def open_output(file):
+    """
+    Context manager yielding the text stream of the output file, stdout for -
+     and None. Output to stdout ends with a newline, like print.
+    """
+    if file in (None, STANDARD_STREAM):
+        try:
+            yield sys.stdout
+            sys.stdout.write('\n')
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # The reader, e.g. head, exited early. Output left in the buffer
+            #  would fail again on exit, so stdout is pointed at devnull
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+        return
+    with open(file, 'w') as output:
+        yield output
+
+
+def collect_files(inputs, manifest=None):
+    """
+    Yields the files of the inputs, each a file, a directory or a glob pattern,
+     followed by the files listed in the newline-delimited manifest (- for stdin)
+    """
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for name in sorted(os.listdir(pattern)):
+                path = os.path.join(pattern, name)
+                if os.path.isfile(path):
+                    yield path
+        elif os.path.isfile(pattern):
+            yield pattern
+        else:
+            yield from sorted(glob.glob(pattern, recursive=True))
+
+    if manifest:
+        with (sys.stdin if manifest == STANDARD_STREAM else open(manifest, 'r')) as lines:
+            for line in lines:
+                if line.strip():
+                    yield line.strip()
+
+
+def crypt_main(cipher, argv=None, prog=None, mode=None):
+    """
+    Encrypts or decrypts the file given on the command line "argv" with the
+     encrypt_file and decrypt_file methods of the "cipher" class
+    Without "mode", the command line chooses encryption or decryption with
+     --encrypt KEY or --decrypt KEY. With "mode" encrypt or decrypt, the
+     key is the first argument.
+    """
+    parser = argparse.ArgumentParser(prog=prog)
+    if mode is None:
+        crypt = parser.add_mutually_exclusive_group(required=True)
+        crypt.add_argument('--encrypt', '-e', metavar='KEY',
+                           help='Specify encryption key.')
+        crypt.add_argument('--decrypt', '-d', metavar='KEY',
+                           help='Specify decryption key.')
+    else:
+        parser.add_argument(mode, metavar='KEY',
+                            help=f'Specify {mode}ion key.')
+    parser.add_argument('file', metavar='FILE', nargs='?', default=STANDARD_STREAM,
+                        help='The input file, - or none for stdin.')
+    parser.add_argument('--out', '-o',
+                        help='The output file.')
+
+    args = vars(parser.parse_args(argv))
+
+    crypt_file = cipher.encrypt_file if args.get('encrypt') else cipher.decrypt_file
+    key = (args.get('encrypt') or args.get('decrypt')).lower()
+
+    # Stream the result, large files are never held in memory whole
+    with open_output(args['out']) as out:
+        crypt_file(input_file(args['file']), out, key)
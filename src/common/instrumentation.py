@@ -0,0 +1,137 @@
+"""
+Module for the opt-in instrumentation of the breakers
+Breakers hold the shared DISABLED stats unless instrumentation is requested,
+ whose methods do nothing, so uninstrumented runs only pay for a few calls per restart
+"""
+
+import contextlib
+import json
+import time
+
+# Seconds between two calls of the progress callback
+PROGRESS_INTERVAL = 1.0
+COUNTERS = ('evaluations', 'accepted_swaps', 'restarts', 'cache_hits', 'cache_misses',
+            'result_cache_hits')
+PHASES = ('load', 'analysis', 'climb', 'finalize')
+
+
+class Stats:
+    """
+    Collects the statistics of a breaker:
+    - counters of score evaluations, accepted swaps, restarts, score cache lookups
+       and results found in the result cache
+    - the seconds spent in the load, analysis, climb and finalize phases
+    - the best key and score reported so far
+    The "progress" callback is called with the best key and score when a key is
+     reported, at most once every "interval" seconds. Only keys beating the
+     best one reported so far count, so the reported score never decreases,
+     also when worker processes forward their keys out of order.
+    """
+
+    enabled = True
+
+    def __init__(self, progress=None, interval=PROGRESS_INTERVAL):
+        self.progress = progress
+        self.interval = interval
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.best_key = None
+        self.best_score = None
+        self.started = time.monotonic()
+        self._next_progress = self.started
+
+    def spawn(self, progress=None):
+        """
+        Returns empty stats with the same interval, e.g. for a worker process
+        Workers only know their own best key, so instead of the progress callback
+         of these stats they call "progress", e.g. forwarding the key to the
+         parent process, which reports it
+        """
+        return Stats(progress, self.interval)
+
+    def count(self, name, amount=1):
+        """
+        Adds "amount" to the counter "name"
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Context manager adding the seconds spent inside it to the phase "name"
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self, key, score, force=False):
+        """
+        Reports a key and its score, calls the progress callback if it is due
+         or "force" is set
+        """
+        if self.best_score is None or score > self.best_score:
+            self.best_key, self.best_score = key, score
+        if self.progress is not None:
+            now = time.monotonic()
+            if force or now >= self._next_progress:
+                self._next_progress = now + self.interval
+                self.progress(self.best_key, self.best_score)
+
+    def merge(self, stats):
+        """
+        Adds the counters, phase times and best key of a stats dict, e.g. from a
+         worker, and reports the best key of all merged stats
+        """
+        for name, amount in stats['counters'].items():
+            self.count(name, amount)
+        for name, seconds in stats['phases'].items():
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+        if stats['best_score'] is not None:
+            self.report(stats['best_key'], stats['best_score'])
+
+    def as_dict(self):
+        """
+        Returns the statistics as a JSON serializable dict
+        """
+        return {
+            'counters': dict(self.counters),
+            'phases': dict(self.phases),
+            'best_key': self.best_key,
+            'best_score': self.best_score,
+            'elapsed': time.monotonic() - self.started,
+        }
+
+    def write(self, file):
+        """
+        Writes the statistics as JSON to the file name "file"
+        """
+        with open(file, 'w') as stats_file:
+            json.dump(self.as_dict(), stats_file, indent=2)
+
+
+class _DisabledStats(Stats):
+    """
+    Stats that record nothing
+    """
+
+    enabled = False
+
+    def spawn(self, progress=None):
+        return self
+
+    def count(self, name, amount=1):
+        pass
+
+    def phase(self, name):
+        return contextlib.nullcontext()
+
+    def report(self, key, score, force=False):
+        pass
+
+    def merge(self, stats):
+        pass
+
+
+DISABLED = _DisabledStats()
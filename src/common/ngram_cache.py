@@ -0,0 +1,115 @@
+"""
+Module for loading normalized logarithmic n-gram tables
+Parsed tables are cached in a binary file, so the frequency files are only
+ parsed again when they or the normalization change
+"""
+
+from array import array
+import hashlib
+from math import log
+import mmap
+import os
+import struct
+import tempfile
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '../../frequency_files/cache')
+# Increase whenever the normalization in _parse_table changes
+NORMALIZATION_VERSION = 1
+MAGIC = b'NGRAMTAB'
+# Magic, normalization version, n-gram order, floor value, source size, source mtime
+HEADER = struct.Struct('<8sIIiqq')
+
+
+def map_log_table(source_file, order, floor=0, cache_dir=CACHE_DIR):
+    """
+    Returns a dense table with 26^order entries of the n-gram frequency file,
+     holding the logarithm of the counts normalized to integers between 0 and
+     1 000 000. N-grams missing from the file get the floor value.
+    The table is a read-only memoryview of integers mapping the cache file, so
+     all processes using the table share the same pages of the page cache
+     instead of holding copies. The cache is rebuilt unless it was built from
+     the same file with the same normalization.
+    Falls back to a view of the parsed table if the cache cannot be written
+    """
+    cache_file, header = _cache_file_and_header(source_file, order, floor, cache_dir)
+
+    view = _map_cache(cache_file, header, 26 ** order)
+    if view is None:
+        table = _parse_table(source_file, order, floor)
+        _write_cache(cache_file, header, table)
+        view = _map_cache(cache_file, header, 26 ** order)
+        if view is None:
+            view = memoryview(table).toreadonly()
+    return view
+
+
+def _cache_file_and_header(source_file, order, floor, cache_dir):
+    """
+    Returns the cache file of a frequency file and the header its cache must have
+    The cache file is named after the file and a hash of its absolute path, so
+     frequency files of the same name in different directories get their own cache
+    """
+    source_stat = os.stat(source_file)
+    header = HEADER.pack(MAGIC, NORMALIZATION_VERSION, order, floor,
+                         source_stat.st_size, source_stat.st_mtime_ns)
+    path_hash = hashlib.sha1(os.path.abspath(source_file).encode('utf-8')).hexdigest()[:16]
+    return (os.path.join(cache_dir, f'{os.path.basename(source_file)}.{path_hash}.bin'), header)
+
+
+def _parse_table(source_file, order, floor):
+    """
+    Parses a frequency file with one "NGRAM COUNT" pair per line into a dense table
+    """
+    counts = {}
+    with open(source_file, 'r', encoding='utf-8') as file:
+        for line in file:
+            key, val = line.split(' ')
+            counts[key.lower()] = int(val)
+
+    normalize_factor = 1000000 / log(max(counts.values()))
+
+    # Calculate logarithm and normalize to integers between 0 and 1 000 000
+    table = array('i', [floor]) * 26 ** order
+    for key, count in counts.items():
+        index = 0
+        for letter in key:
+            index = index * 26 + ord(letter) - 97
+        table[index] = int(log(count) * normalize_factor)
+    return table
+
+
+def _map_cache(cache_file, header, size):
+    """
+    Returns a read-only memoryview of the cached table, or None if the cache is
+     missing or outdated
+    The mapping stays open as long as the view is referenced
+    """
+    try:
+        with open(cache_file, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if data[:HEADER.size] != header or len(data) != HEADER.size + size * 4:
+        data.close()
+        return None
+    # The header size is a multiple of 4, so the integers stay aligned
+    return memoryview(data)[HEADER.size:].cast('i')
+
+
+def _write_cache(cache_file, header, table):
+    """
+    Atomically replaces the cache file, so concurrent readers never see a partial file
+    A cache directory that cannot be written to is ignored
+    """
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        file_descriptor, temp_file = tempfile.mkstemp(dir=os.path.dirname(cache_file))
+    except OSError:
+        return
+    try:
+        with os.fdopen(file_descriptor, 'wb') as file:
+            file.write(header)
+            table.tofile(file)
+        os.replace(temp_file, cache_file)
+    except OSError:
+        os.remove(temp_file)
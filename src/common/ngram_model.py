@@ -0,0 +1,111 @@
+"""
+Module for the read-only n-gram model shared by the breakers
+"""
+
+import hashlib
+import os
+import string
+from array import array
+from ngram_cache import map_log_table
+
+FREQUENCY_DIR = os.path.join(os.path.dirname(__file__), '../../frequency_files')
+ENGLISH_FILES = {
+    1: os.path.join(FREQUENCY_DIR, 'english_monograms.txt'),
+    2: os.path.join(FREQUENCY_DIR, 'english_bigrams.txt'),
+    3: os.path.join(FREQUENCY_DIR, 'english_trigrams.txt'),
+    4: os.path.join(FREQUENCY_DIR, 'english_quadgrams_trimmed.txt'),
+}
+ORDERS = (1, 2, 3, 4)
+ORDER_NAMES = {1: 'monograms', 2: 'bigrams', 3: 'trigrams', 4: 'quadgrams'}
+
+
+def model_files(prefix, orders=ORDERS):
+    """
+    Returns the frequency files of a model by order, named like the english files:
+     PREFIX_monograms.txt, PREFIX_bigrams.txt, PREFIX_trigrams.txt and PREFIX_quadgrams.txt
+    """
+    return {order: f'{prefix}_{ORDER_NAMES[order]}.txt' for order in orders}
+
+
+class NGramModel:
+    """
+    Immutable logarithmic n-gram tables of orders 1 to 4.
+    Every table is a read-only memoryview of 26^order integers, indexed like
+     the dense tables of map_log_table. Loaded from frequency files, the views
+     map the binary cache files, so threads and processes using the model share
+     the same memory however many breakers or restarts use it. Pickling a loaded
+     model, e.g. for a worker process, only transfers the file names.
+    """
+
+    __slots__ = ('_tables', '_files', '_floor', '_fingerprint')
+
+    def __init__(self, tables, files=None, floor=0):
+        """
+        Initializes the model with a dict of dense tables by order
+        "files" and "floor" are the frequency files and floor the tables were
+         loaded with, if any
+        """
+        for order, table in tables.items():
+            if order not in ORDERS or len(table) != 26 ** order:
+                raise ValueError(f'invalid table of order {order}')
+        self._tables = {order: memoryview(table).toreadonly()
+                        for order, table in tables.items()}
+        self._files = dict(files) if files is not None else None
+        self._floor = floor
+        self._fingerprint = None
+
+    @classmethod
+    def load(cls, files=None, floor=0):
+        """
+        Loads the tables of a dict of frequency files by order, by default the
+         english frequency files of all orders
+        """
+        files = dict(files or ENGLISH_FILES)
+        return cls({order: map_log_table(file, order, floor) for order, file in files.items()},
+                   files, floor)
+
+    @property
+    def orders(self):
+        """
+        The orders of the tables of the model
+        """
+        return tuple(sorted(self._tables))
+
+    def table(self, order):
+        """
+        Returns the dense table of the given order
+        """
+        try:
+            return self._tables[order]
+        except KeyError:
+            raise ValueError(f'the model has no table of order {order}') from None
+
+    def fingerprint(self):
+        """
+        Returns a digest of the orders and values of all tables, identifying the
+         model e.g. in result caches. Computed once, in about a millisecond.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for order in self.orders:
+                digest.update(bytes([order]))
+                digest.update(self._tables[order])
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def letters_by_frequency(self):
+        """
+        Returns the letters sorted by their monogram frequency, most frequent first
+        """
+        monograms = self.table(1)
+        return sorted(string.ascii_lowercase, key=lambda letter: monograms[ord(letter) - 97],
+                      reverse=True)
+
+    def __reduce__(self):
+        if self._files is not None:
+            return (NGramModel.load, (self._files, self._floor))
+        return (NGramModel, ({order: array('i', table.tobytes())
+                              for order, table in self._tables.items()},))
+
+    def __repr__(self):
+        return f'NGramModel(orders={self.orders})'
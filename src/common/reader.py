@@ -0,0 +1,87 @@
+"""
+Module for reading file contents
+Files are streamed in fixed-size chunks, so memory use does not depend on the file size
+"""
+
+import os
+import string
+
+CHUNK_SIZE = 1 << 20
+
+_LETTERS = (string.ascii_uppercase + string.ascii_lowercase).encode('ascii')
+# Deletes every byte that is not an ASCII letter, including all bytes of
+#  multi-byte UTF-8 characters
+_NON_LETTERS = bytes(set(range(256)) - set(_LETTERS))
+# Maps letters to lowercase letters
+_LOWER_TABLE = bytes.maketrans(_LETTERS, string.ascii_lowercase.encode('ascii') * 2)
+# Maps letters to letter codes 0..25
+_CODE_TABLE = bytes.maketrans(_LETTERS, bytes(range(26)) * 2)
+
+
+def iter_ascii_chunks(file, chunk_size=CHUNK_SIZE):
+    """
+    Yields the alphabetic characters of the file in lowercase, chunk by chunk
+    "file" is a file name or a binary file object
+    """
+    for chunk in _iter_filtered(file, chunk_size, _LOWER_TABLE):
+        yield chunk.decode('ascii')
+
+
+def iter_code_chunks(file, chunk_size=CHUNK_SIZE):
+    """
+    Yields the alphabetic characters of the file as bytearrays of letter codes 0..25
+    "file" is a file name or a binary file object
+    """
+    for chunk in _iter_filtered(file, chunk_size, _CODE_TABLE):
+        yield bytearray(chunk)
+
+
+def read_ascii_from_file(file):
+    """
+    Used to read alphabetic characters from file and turn them to lowercase
+    """
+    return ''.join(iter_ascii_chunks(file))
+
+
+def ascii_letters(text):
+    """
+    Returns the alphabetic ASCII characters of a string in lowercase
+    """
+    return text.encode('utf-8').translate(_LOWER_TABLE, _NON_LETTERS).decode('ascii')
+
+
+def read_codes_from_file(file):
+    """
+    Reads the alphabetic characters of the file as a bytearray of letter codes 0..25
+    """
+    codes = bytearray()
+    for chunk in iter_code_chunks(file):
+        codes += chunk
+    return codes
+
+
+def letter_codes(data):
+    """
+    Deletes every byte that is not an ASCII letter from the bytes, and returns
+     the letters as bytes of letter codes 0..25
+    """
+    return data.translate(_CODE_TABLE, _NON_LETTERS)
+
+
+def _iter_filtered(file, chunk_size, table):
+    """
+    Yields the non-empty chunks of the file with non-letters deleted and letters
+     translated by the table
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'rb') as binary_file:
+            yield from _iter_filtered(binary_file, chunk_size, table)
+        return
+
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        chunk = chunk.translate(table, _NON_LETTERS)
+        if chunk:
+            yield chunk
@@ -0,0 +1,110 @@
+"""
+Module for caching break results across runs
+Results are stored in an SQLite database, which many processes can read and
+ write at the same time
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_FILE = os.path.join(os.path.dirname(__file__), '../../frequency_files/cache/results.sqlite')
+MAX_ENTRIES = 100000
+# Seconds to wait for a lock held by another process
+BUSY_TIMEOUT = 30
+
+
+def result_digest(text, model, params):
+    """
+    Returns the key of a result: a digest of the normalized ciphertext, the
+     fingerprint of the n-gram model and the JSON of the breaker parameters
+    """
+    digest = hashlib.sha256()
+    digest.update(model.fingerprint().encode('ascii'))
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent map of result digests to the key, score and stats of a break.
+    Holds at most "max_entries" results, evicting the least recently used ones.
+    Every thread of every process opens its own connection, so a cache inherited
+     by worker processes or used from executor threads can be used by all of
+     them. The database uses write-ahead
+     logging, so readers do not block the writer.
+    """
+
+    def __init__(self, file=CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.file = file
+        self.max_entries = max_entries
+        # Connection and process id of the thread, SQLite connections are bound
+        #  to the thread that opened them
+        self._local = threading.local()
+
+    def get(self, digest):
+        """
+        Returns the result stored for the digest as a dict with key, score and
+         stats, or None
+        """
+        connection = self._connect()
+        with connection:
+            row = connection.execute('SELECT key, score, stats FROM results WHERE digest = ?',
+                                     (digest,)).fetchone()
+            if row is None:
+                return None
+            connection.execute('UPDATE results SET last_used = ? WHERE digest = ?',
+                               (time.time(), digest))
+        return {'key': row[0], 'score': row[1],
+                'stats': json.loads(row[2]) if row[2] is not None else None}
+
+    def put(self, digest, key, score, stats=None):
+        """
+        Stores the result of a digest, then evicts the least recently used
+         results beyond the maximum amount
+        """
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO results (digest, key, score, stats, last_used) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (digest, key, score, json.dumps(stats) if stats is not None else None,
+                 time.time()))
+            connection.execute(
+                'DELETE FROM results WHERE digest IN (SELECT digest FROM results '
+                'ORDER BY last_used DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def _connect(self):
+        """
+        Returns the connection of this thread and process, opening it and
+         creating the table if needed
+        """
+        local = self._local
+        if getattr(local, 'connection', None) is None or local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.file)), exist_ok=True)
+            connection = sqlite3.connect(self.file, timeout=BUSY_TIMEOUT)
+            connection.execute('PRAGMA journal_mode=WAL')
+            with connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS results (digest TEXT PRIMARY KEY, '
+                    'key TEXT NOT NULL, score INTEGER, stats TEXT, last_used REAL)')
+                connection.execute('CREATE INDEX IF NOT EXISTS results_last_used '
+                                   'ON results (last_used)')
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    def __getstate__(self):
+        # Connections cannot be pickled, the receiving process opens its own
+        return {'file': self.file, 'max_entries': self.max_entries}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
@@ -0,0 +1,43 @@
+"""
+Module for the process pools running restarts, key lengths and jobs in parallel
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# State shared with the worker processes of a pool, set by _init_worker
+_WORKER_STATE = None
+
+
+def pool_context():
+    """
+    Returns the fork multiprocessing context where available, the default one
+     otherwise. Forked workers inherit the state of the pool copy-on-write, so
+     the n-gram tables are shared with the parent instead of being copied.
+    """
+    start_methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in start_methods else None)
+
+
+def process_pool(workers, state=None):
+    """
+    Returns a ProcessPoolExecutor of "workers" processes, in which worker_state
+     returns "state", e.g. the breaker running the jobs
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(),
+                               initializer=_init_worker, initargs=(state,))
+
+
+def worker_state():
+    """
+    Returns the state of the pool of this worker process
+    """
+    return _WORKER_STATE
+
+
+def _init_worker(state):
+    """
+    Stores the state of the pool in a worker process
+    """
+    global _WORKER_STATE  # pylint: disable=global-statement
+    _WORKER_STATE = state
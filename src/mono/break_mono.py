@@ -3,17 +3,30 @@ Module for breaking monoalphabetic cyphers
 Uses evolutionary algorithm, to iteratively improve key
 """
 
-from reader import read_ascii_from_file
-from mono import Mono
 import argparse
+import copy
 import os
+import queue
 import random
 import string
+import sys
 import threading
-from math import log
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
 from math import inf as INFINITY
-# from statistics import mean # Used for iterations amount benchmarking
-iteration_amount = 0
+sys.path.append(os.path.join(os.path.dirname(__file__), '../common'))
+# pylint: disable=wrong-import-position
+from cli import input_file, open_output, STANDARD_STREAM
+from instrumentation import Stats, DISABLED, PROGRESS_INTERVAL
+from ngram_model import NGramModel, model_files
+from reader import read_ascii_from_file
+from result_cache import ResultCache, result_digest, CACHE_FILE
+from scorer import (build_n_gram_table, encode, n_gram_map, score_encoded, ScoreCache,
+                    SCORE_CACHE_SIZE)
+from stopping import StopCondition, CONFIDENT_SCORE, STALE_ITERATIONS
+from solvers import (HillClimbSolver, SteepestAscentSolver, SimulatedAnnealingSolver,
+                     ParallelTemperingSolver, polish)
+from worker_pool import pool_context, process_pool, worker_state
 
 
 ALPHABET = [chr(i) for i in range(97, 97+26)]
@@ -22,8 +35,46 @@ MONOGRAM_FILE = os.path.join(os.path.dirname(
 N_GRAM_SIZE = 4
 N_GRAM_FILE = os.path.join(os.path.dirname(__file__),
                            '../../frequency_files/english_quadgrams_trimmed.txt')
-MAX_ITERATIONS = 3000
-THREADS = 6
+RESTARTS = 6
+# Letters of the first sample of long ciphertexts, taken from evenly spaced windows
+SAMPLE_SIZE = 3000
+SAMPLE_WINDOWS = 6
+SAMPLE_GROWTH = 2
+SOLVERS = {
+    'hill': HillClimbSolver,
+    'steepest': SteepestAscentSolver,
+    'annealing': SimulatedAnnealingSolver,
+    'tempering': ParallelTemperingSolver,
+}
+
+def _report_forwarded(stats, progress_queue):
+    """
+    Reports the keys forwarded by the worker processes so far
+    """
+    while True:
+        try:
+            key, score = progress_queue.get_nowait()
+        except queue.Empty:
+            return
+        stats.report(key, score)
+
+
+def _run_restart(text, seed, solver, stop):
+    """
+    Runs a single seeded restart in a worker process, whose pool state is the
+     breaker, the cancel event of the restarts and the queue forwarding progress
+     to the parent, None without progress callback
+    Returns the key, its score and the stats dict of the restart, None if disabled
+    """
+    breaker, cancel_event, progress_queue = worker_state()
+    stop = stop.with_cancel_event(cancel_event)
+    if progress_queue is None:
+        breaker.stats = breaker.stats.spawn()
+    else:
+        breaker.stats = breaker.stats.spawn(
+            lambda key, score: progress_queue.put((key, score)))
+    key, score = breaker.break_mono(text, random.Random(seed), stop, solver)
+    return (key, score, breaker.stats.as_dict() if breaker.stats.enabled else None)
 
 
 class MonoBreaker:
@@ -31,123 +82,299 @@ class MonoBreaker:
     Breaks monoalphabetic cyphers
     """
 
-    def __init__(self, monogram_frequencies, n_gram_frequencies):
+    def __init__(self, monogram_frequencies, n_gram_frequencies=None, n_gram_table=None,
+                 solver=None, stats=None):  # pylint: disable=too-many-arguments
         """
         Initializes object with given monogram frequency list and n_gram_frequency map
+         or dense n-gram table
+        The dense n-gram table used for scoring is built from the map if not given
+        The key search strategy is a hill climb unless another solver is given
+        Statistics are only recorded when instrumentation "stats" are given
         """
         self.monogram_frequencies = monogram_frequencies
-        self.n_grams = n_gram_frequencies
+        self._n_grams = n_gram_frequencies
+        self.model = NGramModel({N_GRAM_SIZE: n_gram_table if n_gram_table is not None
+                                 else build_n_gram_table(n_gram_frequencies)})
+        self.solver = solver or HillClimbSolver()
         self.key = ''
         self.score = 0
+        self.stats = stats or DISABLED
+        # Keys scored per ciphertext are cached up to this amount, 0 disables the cache
+        self.cache_size = SCORE_CACHE_SIZE
+        self.score_cache = None
+        self._score_cache_text = None
+        # Results of earlier runs are looked up in this ResultCache, if set
+        self.result_cache = None
+
+    def cache_for(self, text):
+        """
+        Returns the score cache of the text, shared by all restarts breaking it
+         in this process, or None if caching is disabled
+        The cache of the previous text is dropped when a new text is broken
+        """
+        if not self.cache_size:
+            return None
+        if self.score_cache is None or self._score_cache_text != text:
+            self.score_cache = ScoreCache(self.cache_size)
+            self._score_cache_text = text
+        return self.score_cache
+
+    @property
+    def n_gram_table(self):
+        """
+        The dense n-gram table used for scoring, a read-only view of the model
+        """
+        return self.model.table(N_GRAM_SIZE)
+
+    @property
+    def n_grams(self):
+        """
+        The n-gram map, built from the dense table when it was not given
+        """
+        if self._n_grams is None:
+            self._n_grams = n_gram_map(self.n_gram_table)
+        return self._n_grams
 
     @classmethod
-    def from_data_files(cls, monogram_file, n_gram_file):
+    def from_data_files(cls, monogram_file, n_gram_file, stats=None):
         """
         Initlalize m-gram frequencies
         """
-        # Initialize monograms
-        monogram_frequencies = {}
-        with open(monogram_file, 'r', encoding='utf-8') as freq_file:
-            for line in freq_file:
-                key, count = line.split(' ')
-                if (key != '' and count != ''):
-                    monogram_frequencies[key.lower()] = int(count)
-
-        monogram_frequency_list = MonoBreaker._map_to_sorted_list(
-            monogram_frequencies)
-
-        # Initialize m-gram frequencies
-        # Read from file
-        n_grams = {}
-
-        max_val = 0
-        with open(n_gram_file, 'r', encoding='utf-8') as file:
-            for line in file:
-                key, val = line.split(' ')
-                n_grams[key.lower()] = int(val)
-                max_val = max(max_val, int(val))
-
-        normalize_factor = 1000000 / log(max_val)
-
-        # Calculate logarithm and normalize to integers between 0 and 1 000 000
-        for key in n_grams:
-            n_grams[key] = int(log(n_grams[key]) * normalize_factor)
+        stats = stats or DISABLED
+        with stats.phase('load'):
+            # Maps the binary caches of the files, which are rebuilt if outdated
+            model = NGramModel.load({1: monogram_file, N_GRAM_SIZE: n_gram_file})
+        return cls.from_model(model, stats=stats)
 
-        return cls(monogram_frequency_list, n_grams)
+    @classmethod
+    def from_model(cls, model, solver=None, stats=None):
+        """
+        Initializes the breaker with the monogram and n-gram tables of an NGramModel,
+         which is shared instead of copied
+        """
+        breaker = cls(model.letters_by_frequency(), n_gram_table=model.table(N_GRAM_SIZE),
+                      solver=solver, stats=stats)
+        breaker.model = model
+        return breaker
 
-    def break_mono_multi(self, text, tries):
+    def break_mono_multi(self, text, tries, workers=None, seed=None, solver=None,
+                         stop=None):  # pylint: disable=too-many-arguments
         """
-        Creates "tries" amount of threads, and runs break_mono individually in
-         each of them, then takes the result with the highest overall fitness.
+        Runs break_mono "tries" times on a pool of "workers" processes, then takes
+         the result with the highest overall fitness.
         This basically prevents the possibility returning the wrong key due to
          break_mono being stuck at a local maximum.
+        Every restart gets its own seed derived from "seed", so every restart is
+         reproducible. With one worker the whole result is reproducible. With
+         more workers, which restarts finish before a confident one cancels the
+         rest depends on timing, so a different restart may win.
+        The restarts use "solver", the solver of the breaker by default.
+        The StopCondition "stop" applies to every restart, its time limit to all
+         restarts together. Once a restart reaches a confident score, the
+         remaining restarts are cancelled.
+        With a result cache set, the result of an earlier run with the same text
+         and parameters is returned without breaking the text again.
+        Returns the best key and its score
         """
-        breaker_list = []
-        for _ in range(tries):
-            new_breaker = self.copy_state()
-            thread = threading.Thread(
-                target=new_breaker.break_mono, args=(text,))
-            thread.start()
-
-            breaker_list.append((thread, new_breaker))
-
-        for thread, _ in breaker_list:
-            thread.join()
-
-        return max(breaker_list, key=lambda b: b[1].score)[1].key
-
-    def break_mono(self, text):
+        stop = (stop or StopCondition()).start()
+        digest = None
+        if self.result_cache is not None:
+            digest = self._result_digest(text, tries, seed, solver, stop)
+            result = self.result_cache.get(digest)
+            if result is not None:
+                self.stats.count('result_cache_hits')
+                self.key, self.score = result['key'], result['score']
+                self.stats.report(self.key, self.score, force=True)
+                return (self.key, self.score)
+        started = time.monotonic()
+        n_gram_count = len(text) - N_GRAM_SIZE + 1
+        seed_generator = random.Random(seed)
+        seeds = [seed_generator.getrandbits(64) for _ in range(tries)]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, tries))
+
+        results = []
+        if workers == 1:
+            for restart_seed in seeds:
+                results.append(self.break_mono(text, random.Random(restart_seed), stop, solver))
+                if stop.is_confident(results[-1][1], n_gram_count) or stop.is_interrupted():
+                    break
+        else:
+            cancel_event = pool_context().Event()
+            # Workers forward their keys, which are reported while restarts run
+            progress_queue = pool_context().Queue() if self.stats.progress is not None else None
+            timeout = self.stats.interval if progress_queue is not None else None
+            with process_pool(workers, (self, cancel_event, progress_queue)) as pool:
+                futures = [pool.submit(_run_restart, text, restart_seed, solver, stop)
+                           for restart_seed in seeds]
+                running = set(futures)
+                while running:
+                    done, running = wait(running, timeout, FIRST_COMPLETED)
+                    if progress_queue is not None:
+                        _report_forwarded(self.stats, progress_queue)
+                    for future in done:
+                        if future.cancelled():
+                            continue
+                        key, score, restart_stats = future.result()
+                        results.append((key, score))
+                        if restart_stats:
+                            self.stats.merge(restart_stats)
+                        if stop.is_confident(score, n_gram_count):
+                            cancel_event.set()
+                            for pending in futures:
+                                pending.cancel()
+
+        with self.stats.phase('finalize'):
+            self.key, self.score = max(results, key=lambda result: result[1])
+        self.stats.report(self.key, self.score, force=True)
+        # Results cut short by the time limit or a cancellation are not kept
+        if digest is not None and not stop.is_interrupted():
+            self.result_cache.put(digest, self.key, self.score,
+                                  {'restarts': len(results), 'elapsed': time.monotonic() - started})
+        return (self.key, self.score)
+
+    def _result_digest(self, text, tries, seed, solver, stop):  # pylint: disable=too-many-arguments
         """
-        1. Frequency analysis for a key
-        2. Score the deciphered text
-        3. randomly swap 2 characters in the key and score it again
-        4. if score is better, save the new key
-        5. repeat
+        Returns the result cache digest of breaking the text with the model of the
+         breaker and the given parameters
+        The time limit is left out, so jobs with different remaining times share
+         results: results cut short by it are never stored.
         """
-        # global iteration_amount # Used for itertations amounts benchmarking
-        parent_key = self.frequency_analysis(text)
-        parent_score = -99e9
-
-        deciphered = Mono.decrypt(
-            text, parent_key)  # pylint: disable=no-member
-        parent_score = self._score(text)
-
-        i = 0
-        while i < 3000:
-            new_key = list(parent_key)
-
-            # Swap two random characters in the child
-            key_swap_a = random.randint(0, 25)
-            key_swap_b = random.randint(0, 25)
-            new_key[key_swap_a], new_key[key_swap_b] = new_key[key_swap_b], new_key[key_swap_a]
-
-            new_key = ''.join(new_key)
-            deciphered = Mono.decrypt(
-                text, new_key)  # pylint: disable=no-member
-            score = self._score(deciphered)
-
-            # If the child was better, replace the parent with it and restart iterations
-            if score > parent_score:
-                parent_score = score
-                parent_key = new_key
-                # iteration_amount += i # Used for itertations amounts benchmarking
-                # i = 0 # Reset after a meaningful operation
-            else:
-                i += 1
+        solver = solver or self.solver
+        return result_digest(text, self.model, {
+            'cipher': 'mono', 'tries': tries, 'seed': seed,
+            'solver': [type(solver).__name__, vars(solver)],
+            'stop': [stop.stale_iterations, stop.score_threshold,
+                     stop.confident_stale_iterations],
+        })
+
+    def break_mono_sampled(self, text, tries, workers=None, seed=None, solver=None,
+                           stop=None,
+                           sample_size=SAMPLE_SIZE):  # pylint: disable=too-many-arguments
+        """
+        Breaks long ciphertexts on a sample of them, so the time hardly depends on
+         the text length.
+        The sample consists of evenly spaced windows of the text, together
+         "sample_size" letters long, at least SAMPLE_WINDOWS. It is broken with
+         break_mono_multi, then the key is polished with a greedy climb on the
+         full text, which fixes rare letters the sample left swapped. While the
+         score per quadgram of the full text stays below the score threshold of
+         "stop", CONFIDENT_SCORE by default, the sample grows and is broken
+         again, at most until it is the full text.
+        Returns the best key and its score on the full text
+        """
+        if sample_size < SAMPLE_WINDOWS:
+            raise ValueError(f'the sample size is below {SAMPLE_WINDOWS} letters')
+        stop = (stop or StopCondition()).start()
+        threshold = stop.score_threshold if stop.score_threshold is not None \
+            else CONFIDENT_SCORE
+        n_gram_count = len(text) - N_GRAM_SIZE + 1
+        while True:
+            sample = MonoBreaker._sample(text, sample_size)
+            key, score = self.break_mono_multi(sample, tries, workers, seed, solver, stop)
+            if len(sample) == len(text):
+                return (key, score)
+
+            with self.stats.phase('climb'):
+                key, score = polish(self, text, key, stop)
+            self.stats.report(key, score)
+            if score / n_gram_count >= threshold or stop.is_interrupted():
+                self.key, self.score = key, score
+                return (key, score)
+            sample_size *= SAMPLE_GROWTH
+
+    def score_key(self, text, key):
+        """
+        Calculate score of the text decrypted with the key, in one pass
+        """
+        decryption = bytes.maketrans(encode(key), bytes(range(26)))
+        return score_encoded(self.n_gram_table, encode(text).translate(decryption))
 
-        self.key = parent_key
-        self.score = parent_score
-        return (parent_key, parent_score)
+    @staticmethod
+    def _sample(text, sample_size):
+        """
+        Returns SAMPLE_WINDOWS evenly spaced windows of the text, together
+         "sample_size" letters long, or the whole text if it is not longer
+        Only the few n-grams spanning two windows do not occur in the text
+        """
+        if len(text) <= sample_size:
+            return text
+        window = sample_size // SAMPLE_WINDOWS
+        step = (len(text) - window) / (SAMPLE_WINDOWS - 1)
+        return ''.join(text[round(i * step):round(i * step) + window]
+                       for i in range(SAMPLE_WINDOWS))
+
+    async def break_mono_async(self, text, tries=RESTARTS, seed=None, solver=None, stop=None,
+                               executor=None):  # pylint: disable=too-many-arguments
+        """
+        Anytime version of break_mono_multi for asyncio applications
+        Runs the restarts one after another in "executor", a thread pool executor
+         or the default executor of the event loop, and yields every new best key
+         and its score as soon as a restart finds it.
+        The time limit of the StopCondition "stop" serves as deadline. Leaving the
+         loop early or cancelling the task stops the search.
+        """
+        # Imported here, asyncio takes longer to import than the rest of the breaker
+        import asyncio  # pylint: disable=import-outside-toplevel
+        loop = asyncio.get_running_loop()
+        improvements = asyncio.Queue()
+        cancel_event = threading.Event()
+
+        def progress(key, score):
+            loop.call_soon_threadsafe(improvements.put_nowait, (key, score))
+
+        # Shallow copy sharing the read-only tables, reporting to its own stats
+        worker = copy.copy(self)
+        worker.stats = Stats(progress, interval=0)
+        stop = (stop or StopCondition()).start().with_cancel_event(cancel_event)
+        search = loop.run_in_executor(executor, worker.break_mono_multi,
+                                      text, tries, 1, seed, solver, stop)
+        getter = None
+        best_score = None
+        try:
+            while not search.done() or not improvements.empty():
+                getter = asyncio.ensure_future(improvements.get())
+                await asyncio.wait((getter, search), return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                key, score = getter.result()
+                if best_score is None or score > best_score:
+                    best_score = score
+                    yield (key, score)
+            self.key, self.score = await search
+        finally:
+            cancel_event.set()
+            if getter is not None:
+                getter.cancel()
+            self.stats.merge(worker.stats.as_dict())
+
+    def break_mono(self, text, rng=random, stop=None, solver=None):
+        """
+        Searches the key with "solver", the solver of the breaker by default
+        Random decisions are drawn from "rng", the random module by default
+        Stops as decided by the StopCondition "stop", by default after 3000
+         non-improving iterations in a row
+        Returns the best key and its score
+        """
+        stop = (stop or StopCondition()).start()
+        self.stats.count('restarts')
+        self.key, self.score = (solver or self.solver).solve(self, text, rng, stop)
+        self.stats.report(self.key, self.score)
+        return (self.key, self.score)
 
     def _score(self, text):
         """
         Calculate score of the text
+        Reference implementation using the n-gram map, the breaker scores
+         with the dense n-gram table instead
         """
         score = 0
-        # n_grams = self.n_grams
+        n_grams = self.n_grams
         for i in range(len(text) - N_GRAM_SIZE + 1):
             n_gram = text[i:i + N_GRAM_SIZE]
-            score += self.n_grams[n_gram] if n_gram in self.n_grams else 0
+            score += n_grams[n_gram] if n_gram in n_grams else 0
 
         return score
 
@@ -176,66 +403,79 @@ class MonoBreaker:
             guessed_key += permutation[letter]
         return guessed_key
 
-    def copy_state(self):
-        return self.__class__(list(self.monogram_frequencies), self.n_grams.copy())
-
-    @staticmethod
-    def _map_to_sorted_list(frequency_map):
-        return sorted(frequency_map, key=frequency_map.__getitem__, reverse=True)
 
-
-if __name__ == '__main__':
-    # Parse arguments
-    PARSER = argparse.ArgumentParser()
-    PARSER.add_argument('file', metavar='FILE',
-                        help='The input file.')
-    PARSER.add_argument('--out', '-o',
+def main(argv=None, prog=None):
+    """
+    Breaks the file given on the command line "argv" and writes the key
+    """
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument('file', metavar='FILE', nargs='?', default=STANDARD_STREAM,
+                        help='The input file, - or none for stdin.')
+    parser.add_argument('--out', '-o',
                         help='The output file.')
+    parser.add_argument('--workers', '-w', type=int,
+                        help='The amount of worker processes. Defaults to the CPU count.')
+    parser.add_argument('--restarts', '-r', type=int, default=RESTARTS,
+                        help='The amount of independent restarts.')
+    parser.add_argument('--seed', '-s', type=int,
+                        help='The random seed, for reproducible results.')
+    parser.add_argument('--solver', choices=SOLVERS, default='hill',
+                        help='The key search strategy. steepest requires NumPy.')
+    parser.add_argument('--stale', type=int, default=STALE_ITERATIONS,
+                        help='Stop a restart after this many non-improving iterations in a row.')
+    parser.add_argument('--time-limit', '-t', type=float,
+                        help='Stop breaking after this many seconds.')
+    parser.add_argument('--threshold', type=float, default=CONFIDENT_SCORE,
+                        help='Score per quadgram at which the deciphered text counts as english'
+                        ' and the remaining restarts are cancelled.')
+    parser.add_argument('--sample', type=int, nargs='?', const=SAMPLE_SIZE,
+                        help='Break long ciphertexts on a sample of this many letters, '
+                        'enlarged while the result is ambiguous.')
+    parser.add_argument('--model',
+                        help='The prefix of the frequency files of another language, '
+                        'as written by build_model.py.')
+    parser.add_argument('--cache-size', type=int, default=SCORE_CACHE_SIZE,
+                        help='The amount of scored keys cached per process, 0 disables the cache.')
+    parser.add_argument('--cache', nargs='?', const=CACHE_FILE,
+                        help='Reuse the results of earlier runs stored in this SQLite file.')
+    parser.add_argument('--stats',
+                        help='Write counters and phase times as JSON to this file.')
+    parser.add_argument('--progress', type=float, nargs='?', const=PROGRESS_INTERVAL,
+                        help='Print the best key to stderr every PROGRESS seconds.')
+
+    args = vars(parser.parse_args(argv))
+    if args['sample'] is not None and args['sample'] < SAMPLE_WINDOWS:
+        parser.error(f'argument --sample: at least {SAMPLE_WINDOWS} letters are required')
+
+    stats = None
+    if args['stats'] or args['progress'] is not None:
+        stats = Stats(progress=(lambda key, score: print(key, score, file=sys.stderr))
+                      if args['progress'] is not None else None,
+                      interval=args['progress'] or 0)
+
+    if args['model']:
+        files = model_files(args['model'])
+        breaker = MonoBreaker.from_data_files(files[1], files[N_GRAM_SIZE], stats)
+    else:
+        breaker = MonoBreaker.from_data_files(MONOGRAM_FILE, N_GRAM_FILE, stats)
+    breaker.cache_size = args['cache_size']
+    if args['cache']:
+        breaker.result_cache = ResultCache(args['cache'])
+    break_args = (read_ascii_from_file(input_file(args['file'])), args['restarts'],
+                  args['workers'], args['seed'], SOLVERS[args['solver']](),
+                  StopCondition(args['stale'], args['time_limit'], args['threshold']))
+    if args['sample']:
+        key, _ = breaker.break_mono_sampled(*break_args, sample_size=args['sample'])
+    else:
+        key, _ = breaker.break_mono_multi(*break_args)
 
-    ARGS = vars(PARSER.parse_args())
+    with breaker.stats.phase('finalize'):
+        with open_output(args['out']) as out:
+            out.write(key)
 
-    BREAKER = MonoBreaker.from_data_files(MONOGRAM_FILE, N_GRAM_FILE)
-    TEXT = BREAKER.break_mono_multi(
-        read_ascii_from_file(ARGS['file']), THREADS)
+    if args['stats']:
+        stats.write(args['stats'])
 
-    if ARGS['out']:
-        FILE = open(ARGS['out'], 'w')
-        FILE.write(TEXT)
-        FILE.close()
-    else:
-        print(TEXT)
-
-    # BENCHMARK CORRECTNESS
-    # tests_correct = 0
-    # for test_iteration in range(100):
-    #   print(str(test_iteration) + ', ', end='')
-    #   # test_key = BREAKER.break_mono(read_ascii_from_file(FILE))
-    #   test_key = BREAKER.break_mono_multi(read_ascii_from_file(FILE), THREADS)
-    #   if test_key == 'rehmtfzgoxsqwpclbanjdykuiv':
-    #     tests_correct += 1
-    #     print('SUCCESS: ' + test_key)
-    #   else:
-    #     print(' FAILED: ' + test_key)
-
-    # print()
-    # print(str(tests_correct) + '/100')
-
-    # BENCHMARK AMOUNT OF ITERATIONS NEEDED
-    # iteration_amounts = []
-    # iteration_amounts_success = []
-    # for test_iteration in range(100):
-    #   iteration_amount = 0
-    #   print(str(test_iteration) + ', ', end='')
-
-    #   test_key = BREAKER.break_mono(read_ascii_from_file(FILE))
-    #   if test_key == 'rehmtfzgoxsqwpclbanjdykuiv':
-    #     iteration_amounts_success.append(iteration_amount)
-    #     print('SUCCESS: ' + str(iteration_amount))
-    #   else:
-    #     print(' FAILED: ' + str(iteration_amount))
-    #   iteration_amounts.append(iteration_amount)
-
-    # print('Maximum Iterations: ' + str(max(iteration_amounts)))
-    # print('Average Iterations: ' + str(mean(iteration_amounts)))
-    # print('Maximum Iterations (Successfull): ' + str(max(iteration_amounts_success)))
-    # print('Average Iterations (Successfull): ' + str(mean(iteration_amounts_success)))
+
+if __name__ == '__main__':
+    main()
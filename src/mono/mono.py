@@ -2,79 +2,80 @@
 Monoalphabetic encryption and decryption module
 """
 
-import argparse
+import os
 import string
-from reader import read_ascii_from_file
+import sys
+from functools import lru_cache
+sys.path.append(os.path.join(os.path.dirname(__file__), '../common'))
+# pylint: disable=wrong-import-position
+from cli import crypt_main
+from reader import iter_ascii_chunks
+
+CACHED_KEYS = 64
 
 
 class Mono:
     """
     Class implementing encryption and decryption of monoalphabetic cyphers
+    Translation tables are cached per key
     """
+    @staticmethod
+    @lru_cache(maxsize=CACHED_KEYS)
+    def encryption_table(key):
+        """
+        Returns the str.translate table mapping every letter to its key letter
+        """
+        return str.maketrans(string.ascii_lowercase, key)
+
+    @staticmethod
+    @lru_cache(maxsize=CACHED_KEYS)
+    def decryption_table(key):
+        """
+        Returns the str.translate table mapping every key letter to its letter
+        """
+        return str.maketrans(key, string.ascii_lowercase)
+
     @staticmethod
     def encrypt(text, key):
         """
         Encrypts the monoalphalbetic cypher
         """
-        # create a dictonary for the passed key-alphabet
-        dictionary = {}
-        for letter, key_letter in zip(string.ascii_lowercase, key):
-            dictionary[letter] = key_letter
-
-        result = ''
-        for letter in text.lower():
-            if letter in string.ascii_lowercase:
-                result += dictionary[letter]
-            else:
-                result += letter
-        return result
+        return text.lower().translate(Mono.encryption_table(key))
 
     @staticmethod
     def decrypt(text, key):
         """
         Decrypts the monoalphalbetic cypher
         """
-        # create reversed dictionary
-        dictionary = {}
-        for key_letter, letter in zip(key, string.ascii_lowercase):
-            dictionary[key_letter] = letter
-
-        result = ''
-        for letter in text.lower():
-            if letter in string.ascii_lowercase:
-                result += dictionary[letter]
-            else:
-                result += letter
-        return result
+        return text.lower().translate(Mono.decryption_table(key))
 
+    @staticmethod
+    def encrypt_file(file, out, key):
+        """
+        Encrypts the alphabetic characters of a file chunk by chunk and writes
+         them to the text stream "out", without loading the file whole
+        """
+        table = Mono.encryption_table(key)
+        for chunk in iter_ascii_chunks(file):
+            out.write(chunk.translate(table))
 
-if __name__ == '__main__':
-    PARSER = argparse.ArgumentParser()
-    CRYPT = PARSER.add_mutually_exclusive_group(required=True)
-
-    CRYPT.add_argument('--encrypt', '-e', metavar='KEY',
-                       help='Specify encryption key.')
-    CRYPT.add_argument('--decrypt', '-d', metavar='KEY',
-                       help='Specify decryption key.')
+    @staticmethod
+    def decrypt_file(file, out, key):
+        """
+        Decrypts the alphabetic characters of a file chunk by chunk and writes
+         them to the text stream "out", without loading the file whole
+        """
+        table = Mono.decryption_table(key)
+        for chunk in iter_ascii_chunks(file):
+            out.write(chunk.translate(table))
 
-    PARSER.add_argument('file', metavar='FILE',
-                        help='The input file.')
-    PARSER.add_argument('--out', '-o',
-                        help='The output file.')
 
-    ARGS = vars(PARSER.parse_args())
+def main(argv=None, prog=None, mode=None):
+    """
+    Encrypts or decrypts the file given on the command line "argv", see crypt_main
+    """
+    crypt_main(Mono, argv, prog, mode)
 
-    TEXT = ''
-    if ARGS['encrypt']:
-        TEXT = Mono.encrypt(read_ascii_from_file(
-            ARGS['file']), ARGS['encrypt'].lower())
-    elif ARGS['decrypt']:
-        TEXT = Mono.decrypt(read_ascii_from_file(
-            ARGS['file']), ARGS['decrypt'].lower())
 
-    if ARGS['out']:
-        FILE = open(ARGS['out'], 'w')
-        FILE.write(TEXT)
-        FILE.close()
-    else:
-        print(TEXT)
+if __name__ == '__main__':
+    main()
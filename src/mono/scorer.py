@@ -0,0 +1,239 @@
+"""
+Module for incrementally scoring monoalphabetic key candidates
+Only the n-grams touching swapped letters are rescored
+"""
+
+from array import array
+from collections import OrderedDict
+import string
+
+N_GRAM_SIZE = 4
+TABLE_SIZE = 26 ** N_GRAM_SIZE
+ENCODE_TABLE = bytes.maketrans(string.ascii_lowercase.encode('ascii'), bytes(range(26)))
+SCORE_CACHE_SIZE = 1 << 14
+
+
+def encode(text):
+    """
+    Encodes lowercase text as bytes of letter codes 0..25
+    """
+    return text.encode('ascii').translate(ENCODE_TABLE)
+
+
+def n_gram_index(n_gram):
+    """
+    Returns the index of a lowercase n-gram in a dense n-gram table
+    """
+    index = 0
+    for letter in n_gram:
+        index = index * 26 + ord(letter) - 97
+    return index
+
+
+def build_n_gram_table(n_grams, floor=0):
+    """
+    Builds a dense table with 26^N_GRAM_SIZE entries from an n-gram map
+    N-grams missing from the map get the floor value
+    """
+    table = array('i', [floor]) * TABLE_SIZE
+    for n_gram, value in n_grams.items():
+        table[n_gram_index(n_gram)] = value
+    return table
+
+
+def n_gram_map(table, floor=0):
+    """
+    Builds an n-gram map from a dense n-gram table, leaving out floor values
+    """
+    n_grams = {}
+    for index, value in enumerate(table):
+        if value != floor:
+            n_gram = ''
+            for _ in range(N_GRAM_SIZE):
+                n_gram = string.ascii_lowercase[index % 26] + n_gram
+                index //= 26
+            n_grams[n_gram] = value
+    return n_grams
+
+
+def score_encoded(table, codes):
+    """
+    Calculates the score of encoded text using a rolling n-gram index
+    """
+    score = 0
+    index = 0
+    for i, code in enumerate(codes):
+        index = (index * 26 + code) % TABLE_SIZE
+        if i >= N_GRAM_SIZE - 1:
+            score += table[index]
+    return score
+
+
+class ScoreCache:
+    """
+    Bounded map of keys to their scores for one ciphertext, evicting the least
+     recently used key once "capacity" keys are stored.
+    Keys are packed as the 26 bytes of their letter codes. A permutation of 26
+     letters needs 89 bits, so it does not fit a 64 bit integer, but the bytes
+     hash as fast.
+    """
+
+    def __init__(self, capacity=SCORE_CACHE_SIZE):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._scores = OrderedDict()
+
+    def get(self, packed_key):
+        """
+        Returns the cached score of the packed key, or None
+        """
+        score = self._scores.get(packed_key)
+        if score is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._scores.move_to_end(packed_key)
+        return score
+
+    def put(self, packed_key, score):
+        """
+        Stores the score of the packed key
+        """
+        self._scores[packed_key] = score
+        if len(self._scores) > self.capacity:
+            self._scores.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        """
+        Share of lookups answered from the cache
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self._scores)
+
+
+class IncrementalScorer:
+    """
+    Keeps the deciphered text of the current key and its n-gram score.
+    A swap of two key letters only rescores the n-grams covering positions
+     of the two affected cipher letters, and can be rolled back cheaply.
+    With a ScoreCache, keys already scored are looked up instead, which saves
+     most of the work when a climb tries the same swaps of a local maximum again.
+    """
+
+    def __init__(self, table, text, key, cache=None):
+        """
+        Initializes the scorer with a dense n-gram table, the ciphertext, a starting
+         key and optionally the score cache of the ciphertext
+        """
+        self.table = table
+        self.codes = encode(text)
+        self.key = list(encode(key))
+
+        # Positions of every cipher letter in the ciphertext
+        self.positions = [[] for _ in range(26)]
+        for i, code in enumerate(self.codes):
+            self.positions[code].append(i)
+
+        # Deciphered buffer of the current key
+        self.plain = [0] * len(self.codes)
+        for plain_code, cipher_code in enumerate(self.key):
+            for i in self.positions[cipher_code]:
+                self.plain[i] = plain_code
+
+        self.score = score_encoded(table, self.plain)
+        self.evaluations = 0
+        self.cache = cache
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._undo = None
+        if cache is not None:
+            cache.put(bytes(self.key), self.score)
+
+    def swap(self, key_swap_a, key_swap_b):
+        """
+        Swaps two letters of the key and updates the score
+        Returns the new score
+        """
+        self._undo = (key_swap_a, key_swap_b, self.score)
+        self.evaluations += 1
+        if key_swap_a == key_swap_b:
+            return self.score
+
+        if self.cache is not None:
+            key = self.key
+            key[key_swap_a], key[key_swap_b] = key[key_swap_b], key[key_swap_a]
+            packed_key = bytes(key)
+            key[key_swap_a], key[key_swap_b] = key[key_swap_b], key[key_swap_a]
+            score = self.cache.get(packed_key)
+            if score is not None:
+                self.cache_hits += 1
+                self._apply_swap(key_swap_a, key_swap_b)
+                self.score = score
+                return score
+
+        starts = self._affected_starts(key_swap_a, key_swap_b)
+        old_score = self._score_starts(starts)
+        self._apply_swap(key_swap_a, key_swap_b)
+        self.score += self._score_starts(starts) - old_score
+        if self.cache is not None:
+            self.cache_misses += 1
+            self.cache.put(packed_key, self.score)
+        return self.score
+
+    def revert(self):
+        """
+        Rolls back the last swap
+        """
+        if self._undo is None:
+            return
+        key_swap_a, key_swap_b, score = self._undo
+        if key_swap_a != key_swap_b:
+            self._apply_swap(key_swap_a, key_swap_b)
+        self.score = score
+        self._undo = None
+
+    def get_key(self):
+        """
+        Returns the current key as a string
+        """
+        return ''.join(string.ascii_lowercase[code] for code in self.key)
+
+    def _apply_swap(self, key_swap_a, key_swap_b):
+        """
+        Swaps two key letters and rewrites the deciphered buffer at their positions
+        """
+        key = self.key
+        key[key_swap_a], key[key_swap_b] = key[key_swap_b], key[key_swap_a]
+        plain = self.plain
+        for i in self.positions[key[key_swap_a]]:
+            plain[i] = key_swap_a
+        for i in self.positions[key[key_swap_b]]:
+            plain[i] = key_swap_b
+
+    def _affected_starts(self, key_swap_a, key_swap_b):
+        """
+        Returns the start positions of all n-grams covering one of the two cipher letters
+        """
+        last_start = len(self.codes) - N_GRAM_SIZE
+        starts = set()
+        for cipher_code in (self.key[key_swap_a], self.key[key_swap_b]):
+            for i in self.positions[cipher_code]:
+                starts.update(range(max(0, i - N_GRAM_SIZE + 1), min(i, last_start) + 1))
+        return starts
+
+    def _score_starts(self, starts):
+        """
+        Sums the n-gram scores of the given start positions
+        """
+        score = 0
+        plain = self.plain
+        table = self.table
+        for i in starts:
+            score += table[((plain[i] * 26 + plain[i + 1]) * 26 + plain[i + 2]) * 26
+                           + plain[i + 3]]
+        return score
@@ -0,0 +1,308 @@
+"""
+Module with the key search strategies of the monoalphabetic breaker
+Every solver starts from the frequency analysis key of the breaker and
+ returns the best key it finds together with its score
+"""
+
+import math
+from scorer import N_GRAM_SIZE, IncrementalScorer
+
+# Maximum amount of random swaps applied to the starting key of a steepest ascent restart
+STEEPEST_PERTURBATION = 5
+
+
+def _count_cache_lookups(stats, scorers):
+    """
+    Records the score cache hits and misses of the incremental scorers
+    """
+    stats.count('cache_hits', sum(scorer.cache_hits for scorer in scorers))
+    stats.count('cache_misses', sum(scorer.cache_misses for scorer in scorers))
+
+
+def polish(breaker, text, key, stop):
+    """
+    Greedy climb from "key", trying all letter swaps in a fixed order until none
+     improves the score or the StopCondition "stop" interrupts it
+    Fixes the rare letters a key found on a sample of the text can still swap
+    Returns the polished key and its score
+    """
+    stats = breaker.stats
+    scorer = IncrementalScorer(breaker.n_gram_table, text, key, breaker.cache_for(text))
+    accepted = 0
+    improved = True
+    while improved and not stop.is_interrupted():
+        improved = False
+        for key_swap_a in range(25):
+            for key_swap_b in range(key_swap_a + 1, 26):
+                parent_score = scorer.score
+                if scorer.swap(key_swap_a, key_swap_b) > parent_score:
+                    improved = True
+                    accepted += 1
+                else:
+                    scorer.revert()
+
+    stats.count('evaluations', scorer.evaluations)
+    stats.count('accepted_swaps', accepted)
+    _count_cache_lookups(stats, [scorer])
+    return (scorer.get_key(), scorer.score)
+
+
+class Solver:  # pylint: disable=too-few-public-methods
+    """
+    Base class of the key search strategies
+    """
+
+    def solve(self, breaker, text, rng, stop):
+        """
+        Searches the key of the text using the tables of the breaker
+        Random decisions are drawn from "rng", the StopCondition "stop" decides
+         when to stop
+        Records evaluations, accepted swaps, phase times and improving keys in
+         the stats of the breaker
+        Returns the best key and its score
+        """
+        raise NotImplementedError
+
+
+class HillClimbSolver(Solver):  # pylint: disable=too-few-public-methods
+    """
+    Greedy hill climb:
+    1. Frequency analysis for a key
+    2. Score the deciphered text
+    3. randomly swap 2 characters in the key and score it again
+    4. if score is better, keep the swap, otherwise roll it back
+    5. repeat
+    Only the n-grams touching the swapped letters are rescored per iteration
+    """
+
+    def solve(self, breaker, text, rng, stop):
+        stats = breaker.stats
+        with stats.phase('analysis'):
+            scorer = IncrementalScorer(breaker.n_gram_table, text,
+                                       breaker.frequency_analysis(text),
+                                       breaker.cache_for(text))
+        parent_score = scorer.score
+        n_gram_count = len(text) - N_GRAM_SIZE + 1
+
+        with stats.phase('climb'):
+            i = 0
+            accepted = 0
+            while not stop.should_stop(i, parent_score, n_gram_count):
+                # Swap two random characters in the key
+                key_swap_a = rng.randint(0, 25)
+                key_swap_b = rng.randint(0, 25)
+                score = scorer.swap(key_swap_a, key_swap_b)
+
+                # If the child was better, keep it and restart iterations
+                if score > parent_score:
+                    parent_score = score
+                    i = 0  # Reset after a meaningful operation
+                    accepted += 1
+                    if stats.enabled:
+                        stats.report(scorer.get_key(), parent_score)
+                else:
+                    scorer.revert()
+                    i += 1
+
+        stats.count('evaluations', scorer.evaluations)
+        stats.count('accepted_swaps', accepted)
+        _count_cache_lookups(stats, [scorer])
+        return (scorer.get_key(), parent_score)
+
+
+class SteepestAscentSolver(Solver):  # pylint: disable=too-few-public-methods
+    """
+    Steepest ascent, requires NumPy:
+    1. Frequency analysis for a key, perturbed by a few random swaps
+    2. Score all 325 swaps of the key in one vectorized pass
+    3. Apply the best swap if it improves the score
+    4. repeat until no swap improves the score, or the climb is interrupted
+    """
+
+    def solve(self, breaker, text, rng, stop):
+        from vector_scorer import BatchScorer, SWAP_PAIRS  # pylint: disable=import-outside-toplevel
+
+        stats = breaker.stats
+        with stats.phase('analysis'):
+            parent_key = list(breaker.frequency_analysis(text))
+            for _ in range(rng.randint(0, STEEPEST_PERTURBATION)):
+                key_swap_a = rng.randint(0, 25)
+                key_swap_b = rng.randint(0, 25)
+                parent_key[key_swap_a], parent_key[key_swap_b] = \
+                    parent_key[key_swap_b], parent_key[key_swap_a]
+
+            scorer = BatchScorer(breaker.n_gram_table, text)
+            parent_score = int(scorer.score_keys(
+                scorer.decrypt_tables([''.join(parent_key)]))[0])
+
+        with stats.phase('climb'):
+            accepted = 0
+            while not stop.is_interrupted():
+                scores = scorer.score_swaps(''.join(parent_key))
+                best = int(scores.argmax())
+                if scores[best] <= parent_score:
+                    break
+                key_swap_a, key_swap_b = SWAP_PAIRS[best]
+                parent_key[key_swap_a], parent_key[key_swap_b] = \
+                    parent_key[key_swap_b], parent_key[key_swap_a]
+                parent_score = int(scores[best])
+                accepted += 1
+                stats.report(''.join(parent_key), parent_score)
+
+        stats.count('evaluations', scorer.evaluations)
+        stats.count('accepted_swaps', accepted)
+        return (''.join(parent_key), parent_score)
+
+
+class SimulatedAnnealingSolver(Solver):  # pylint: disable=too-few-public-methods
+    """
+    Simulated annealing:
+    Like the hill climb, but a worse swap is kept with probability
+     exp(score difference / temperature). The temperature cools geometrically
+     from "start_temperature" to "end_temperature" over "steps" swaps, then
+     the search continues greedily until the StopCondition stops it. Cooling
+     ends early once the best score is confident, then the best key is
+     polished greedily for the whole stale budget.
+    Temperatures are in score units per quadgram of the text, so they do not
+     depend on the text length.
+    """
+
+    def __init__(self, start_temperature=10000, end_temperature=200, steps=20000):
+        self.start_temperature = start_temperature
+        self.end_temperature = end_temperature
+        self.steps = steps
+
+    def solve(self, breaker, text, rng, stop):
+        stats = breaker.stats
+        with stats.phase('analysis'):
+            scorer = IncrementalScorer(breaker.n_gram_table, text,
+                                       breaker.frequency_analysis(text),
+                                       breaker.cache_for(text))
+        best_key, best_score = scorer.get_key(), scorer.score
+        n_gram_count = len(text) - N_GRAM_SIZE + 1
+        cooling = (self.end_temperature / self.start_temperature) ** (1 / self.steps)
+        # Texts without quadgrams keep positive temperatures
+        temperature = self.start_temperature * max(1, n_gram_count)
+
+        with stats.phase('climb'):
+            step = 0
+            stale = 0
+            accepted = 0
+            polishing = False
+            scorers = [scorer]
+            while not stop.is_interrupted():
+                if step >= self.steps:
+                    # The stale budget only applies after cooling, a polish uses all of it
+                    if stale >= stop.stale_iterations or \
+                            (not polishing and stop.should_stop(stale, best_score, n_gram_count)):
+                        break
+                elif stop.should_stop(stale, best_score, n_gram_count) and \
+                        stop.is_confident(best_score, n_gram_count):
+                    # A confident score ends cooling early. The walk may have left the
+                    #  best key, which can still swap rare letters, so it is polished greedily
+                    scorer = IncrementalScorer(breaker.n_gram_table, text, best_key,
+                                               breaker.cache_for(text))
+                    scorers.append(scorer)
+                    step, stale, polishing = self.steps, 0, True
+                    continue
+                parent_score = scorer.score
+                score = scorer.swap(rng.randint(0, 25), rng.randint(0, 25))
+                if step < self.steps:
+                    accept = score >= parent_score or \
+                        rng.random() < math.exp((score - parent_score) / temperature)
+                    temperature *= cooling
+                else:
+                    accept = score > parent_score
+                if accept:
+                    accepted += 1
+                else:
+                    scorer.revert()
+
+                if scorer.score > best_score:
+                    best_key, best_score = scorer.get_key(), scorer.score
+                    stale = 0
+                    stats.report(best_key, best_score)
+                else:
+                    stale += 1
+                step += 1
+
+        stats.count('evaluations', sum(scorer.evaluations for scorer in scorers))
+        stats.count('accepted_swaps', accepted)
+        _count_cache_lookups(stats, scorers)
+        return (best_key, best_score)
+
+
+class ParallelTemperingSolver(Solver):  # pylint: disable=too-few-public-methods
+    """
+    Parallel tempering:
+    Runs "chains" annealing chains at fixed temperatures, spaced geometrically
+     between "min_temperature" and "max_temperature". After every
+     "exchange_interval" swaps per chain, neighbouring chains exchange their
+     states with the Metropolis probability, so good keys found by hot chains
+     travel down to the coldest one.
+    Stops when the best score did not improve for the stale budget of the
+     StopCondition, counted in swaps of the coldest chain.
+    Temperatures are in score units per quadgram of the text.
+    """
+
+    def __init__(self, chains=4, min_temperature=200, max_temperature=10000,
+                 exchange_interval=100):
+        self.chains = chains
+        self.min_temperature = min_temperature
+        self.max_temperature = max_temperature
+        self.exchange_interval = exchange_interval
+
+    def _temperatures(self):
+        """
+        Returns the geometrically spaced chain temperatures, coldest first
+        """
+        if self.chains == 1:
+            return [self.min_temperature]
+        ratio = (self.max_temperature / self.min_temperature) ** (1 / (self.chains - 1))
+        return [self.min_temperature * ratio ** i for i in range(self.chains)]
+
+    def solve(self, breaker, text, rng, stop):
+        n_gram_count = len(text) - N_GRAM_SIZE + 1
+        # Texts without quadgrams keep positive temperatures
+        temperatures = [temperature * max(1, n_gram_count) for temperature in self._temperatures()]
+        stats = breaker.stats
+        with stats.phase('analysis'):
+            start_key = breaker.frequency_analysis(text)
+            cache = breaker.cache_for(text)
+            chains = [IncrementalScorer(breaker.n_gram_table, text, start_key, cache)
+                      for _ in temperatures]
+        best_key, best_score = start_key, chains[0].score
+
+        with stats.phase('climb'):
+            stale = 0
+            accepted = 0
+            while not stop.should_stop(stale, best_score, n_gram_count):
+                improved = False
+                for scorer, temperature in zip(chains, temperatures):
+                    for _ in range(self.exchange_interval):
+                        parent_score = scorer.score
+                        score = scorer.swap(rng.randint(0, 25), rng.randint(0, 25))
+                        if score < parent_score and \
+                                rng.random() >= math.exp((score - parent_score) / temperature):
+                            scorer.revert()
+                            continue
+                        accepted += 1
+                        if score > best_score:
+                            best_key, best_score = scorer.get_key(), score
+                            improved = True
+
+                # Exchange states between neighbouring temperatures
+                for i in range(len(chains) - 1):
+                    exponent = (chains[i + 1].score - chains[i].score) * \
+                        (1 / temperatures[i] - 1 / temperatures[i + 1])
+                    if exponent >= 0 or rng.random() < math.exp(exponent):
+                        chains[i], chains[i + 1] = chains[i + 1], chains[i]
+
+                stale = 0 if improved else stale + self.exchange_interval
+                if improved:
+                    stats.report(best_key, best_score)
+
+        stats.count('evaluations', sum(scorer.evaluations for scorer in chains))
+        stats.count('accepted_swaps', accepted)
+        _count_cache_lookups(stats, chains)
+        return (best_key, best_score)
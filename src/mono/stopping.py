@@ -0,0 +1,73 @@
+"""
+Module for the stopping rules of the monoalphabetic hill climbs
+"""
+
+import copy
+import time
+
+STALE_ITERATIONS = 3000
+CONFIDENT_STALE_ITERATIONS = 1500
+# Score per quadgram above which deciphered text looks like english.
+# English text scores about 700 000 to 740 000, local maxima of wrong keys
+#  usually stay below 630 000.
+CONFIDENT_SCORE = 690000
+
+
+class StopCondition:
+    """
+    Decides when a hill climb stops:
+    - after "stale_iterations" non-improving iterations in a row
+    - when the "time_limit" in seconds has passed since start was called
+    - after "confident_stale_iterations" non-improving iterations in a row,
+       once the score per quadgram reaches "score_threshold"
+    - when the optional multiprocessing "cancel_event" is set
+    """
+
+    def __init__(self, stale_iterations=STALE_ITERATIONS, time_limit=None,
+                 score_threshold=None, confident_stale_iterations=CONFIDENT_STALE_ITERATIONS):
+        self.stale_iterations = stale_iterations
+        self.time_limit = time_limit
+        self.score_threshold = score_threshold
+        self.confident_stale_iterations = confident_stale_iterations
+        self.cancel_event = None
+        self.deadline = None
+
+    def start(self):
+        """
+        Starts the clock of the time limit, unless it was already started
+        Returns a copy of the condition, so one condition can be reused for many climbs
+        """
+        started = copy.copy(self)
+        if self.time_limit is not None and self.deadline is None:
+            started.deadline = time.monotonic() + self.time_limit
+        return started
+
+    def with_cancel_event(self, cancel_event):
+        """
+        Returns a copy of the condition that also stops once cancel_event is set
+        """
+        cancellable = copy.copy(self)
+        cancellable.cancel_event = cancel_event
+        return cancellable
+
+    def is_confident(self, score, n_gram_count):
+        """
+        Checks whether the score per quadgram reaches the score threshold
+        """
+        return (self.score_threshold is not None and n_gram_count > 0
+                and score / n_gram_count >= self.score_threshold)
+
+    def is_interrupted(self):
+        """
+        Checks whether the deadline has passed or the climb was cancelled
+        """
+        return ((self.deadline is not None and time.monotonic() >= self.deadline)
+                or (self.cancel_event is not None and self.cancel_event.is_set()))
+
+    def should_stop(self, stale, score, n_gram_count):
+        """
+        Checks whether a climb with "stale" non-improving iterations in a row should stop
+        """
+        if stale >= self.stale_iterations or self.is_interrupted():
+            return True
+        return stale >= self.confident_stale_iterations and self.is_confident(score, n_gram_count)
@@ -0,0 +1,76 @@
+"""
+Module for scoring many monoalphabetic key candidates in one vectorized pass
+Requires NumPy
+"""
+
+from itertools import combinations
+import numpy as np
+from scorer import N_GRAM_SIZE, encode
+
+# All 325 swaps of two different key letters
+SWAP_PAIRS = np.array(list(combinations(range(26), 2)), dtype=np.intp)
+# Upper bound of deciphered letters held in memory per scoring chunk
+CHUNK_LETTERS = 1 << 22
+
+
+class BatchScorer:
+    """
+    Scores all swaps of a parent key at once.
+    The ciphertext is mapped through every candidate key with a NumPy gather,
+     then the quadgram indices are looked up in the flattened n-gram table.
+    """
+
+    def __init__(self, table, text):
+        """
+        Initializes the scorer with a dense n-gram table and the ciphertext
+        """
+        self.table = np.frombuffer(table, dtype=np.int32) if not isinstance(
+            table, np.ndarray) else table
+        self.codes = np.frombuffer(encode(text), dtype=np.uint8)
+        self.chunk_rows = max(1, CHUNK_LETTERS // max(1, len(self.codes)))
+        self.evaluations = 0
+
+    def score_keys(self, decrypt_tables):
+        """
+        Scores a matrix of decryption tables, one row per candidate, mapping
+         cipher codes to plain codes
+        Returns the scores as an int64 array
+        """
+        scores = np.empty(len(decrypt_tables), dtype=np.int64)
+        self.evaluations += len(decrypt_tables)
+        if len(self.codes) < N_GRAM_SIZE:
+            scores.fill(0)
+            return scores
+
+        for start in range(0, len(decrypt_tables), self.chunk_rows):
+            rows = decrypt_tables[start:start + self.chunk_rows]
+            plain = rows[:, self.codes].astype(np.int32)
+            index = plain[:, :-3] * 17576 + plain[:, 1:-2] * 676 + plain[:, 2:-1] * 26 \
+                + plain[:, 3:]
+            scores[start:start + len(rows)] = self.table[index].sum(axis=1, dtype=np.int64)
+        return scores
+
+    @staticmethod
+    def decrypt_tables(keys):
+        """
+        Turns keys into decryption tables mapping cipher codes to plain codes
+        """
+        key_codes = np.frombuffer(encode(''.join(keys)), dtype=np.uint8).reshape(-1, 26)
+        tables = np.empty_like(key_codes)
+        np.put_along_axis(tables, key_codes.astype(np.intp),
+                          np.arange(26, dtype=np.uint8)[np.newaxis, :].repeat(len(keys), 0), 1)
+        return tables
+
+    def score_swaps(self, key):
+        """
+        Scores every swap of two letters of the given key
+        Returns the scores in the order of SWAP_PAIRS
+        """
+        parent = self.decrypt_tables([key])[0]
+        key = np.frombuffer(encode(key), dtype=np.uint8).astype(np.intp)
+
+        candidates = np.tile(parent, (len(SWAP_PAIRS), 1))
+        rows = np.arange(len(SWAP_PAIRS))
+        candidates[rows, key[SWAP_PAIRS[:, 0]]] = SWAP_PAIRS[:, 1]
+        candidates[rows, key[SWAP_PAIRS[:, 1]]] = SWAP_PAIRS[:, 0]
+        return self.score_keys(candidates)
@@ -0,0 +1,363 @@
+"""
+Module for breaking ciphertexts in a long-running local service
+The n-gram tables are loaded once and shared with a pool of worker processes.
+ Clients connect to a Unix socket or a localhost TCP port and send one JSON
+ request per line, every response is one JSON line as well.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+import sys
+import time
+from collections import deque
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(SRC_DIR, directory) for directory in ('common', 'mono', 'vigenere')]
+# pylint: disable=wrong-import-position
+from ngram_model import NGramModel, model_files
+from reader import ascii_letters
+from result_cache import ResultCache, CACHE_FILE
+from worker_pool import process_pool, worker_state
+from mono import Mono
+from vig import Vigenere
+from batch import BatchBreaker, CIPHERS
+import break_mono
+
+OPERATIONS = ('encrypt', 'decrypt', 'break', 'metrics')
+CRYPTERS = {'mono': Mono, 'vigenere': Vigenere}
+# Jobs waiting for a worker, further jobs are rejected until the queue drains
+MAX_QUEUED = 1000
+# Seconds a job may take from submission until its result, None for no limit
+JOB_TIMEOUT = 60.0
+# Seconds a monoalphabetic break stopped by its timeout may take to return its best key
+TIMEOUT_GRACE = 1.0
+# Seconds of completed jobs the throughput is averaged over
+THROUGHPUT_WINDOW = 60.0
+# Bytes of the longest request line
+MAX_REQUEST_SIZE = 1 << 24
+
+class BreakingServer:
+    """
+    Runs encrypt, decrypt and break jobs on a pool of "workers" processes.
+    Jobs wait in a priority queue of at most "max_queued" jobs, higher priorities
+     first and jobs of the same priority in order of submission. Every worker
+     takes the next job only once it is free, so priorities also hold under load.
+    A job times out "timeout" seconds after its submission, unless the request
+     sets its own timeout. Monoalphabetic breaks still running by then return
+     their best key so far. Vigenere breaks, encryptions and decryptions have
+     no time limit, a timeout only stops waiting for them. They take time
+     proportional to the text length, which MAX_REQUEST_SIZE bounds, and
+     their worker takes the next job only after they finish.
+    """
+
+    def __init__(self, batch_breaker, workers=None, max_queued=MAX_QUEUED,
+                 timeout=JOB_TIMEOUT):
+        self.batch_breaker = batch_breaker
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.counters = dict.fromkeys(('submitted', 'completed', 'failed', 'rejected',
+                                       'timed_out'), 0)
+        self.running = 0
+        self.started = time.monotonic()
+        self._completions = deque()
+        self._sequence = itertools.count()
+        self._queue = None
+        self._pool = None
+        self._dispatchers = []
+
+    async def start(self):
+        """
+        Starts the worker pool and the tasks handing jobs to it
+        """
+        self._pool = process_pool(self.workers, self.batch_breaker)
+        self._queue = asyncio.PriorityQueue()
+        self._dispatchers = [asyncio.create_task(self._dispatch())
+                             for _ in range(self.workers)]
+
+    async def stop(self):
+        """
+        Cancels the queued jobs and shuts the worker pool down
+        """
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        while not self._queue.empty():
+            self._queue.get_nowait()[3].cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def submit(self, request):
+        """
+        Runs the job of a request dict and returns the response dict
+        Requests have an "op" of encrypt, decrypt, break or metrics, and
+         - for encrypt and decrypt the "cipher", "text" and "key"
+         - for break the "text" and the "cipher" mono, vigenere or auto
+         - optionally a "priority", 0 by default, and a "timeout" in seconds
+        The response has the "id" of the request, if any, and either the
+         result or an "error" message
+        """
+        response = {'id': request['id']} if 'id' in request else {}
+        operation = request.get('op')
+        if operation == 'metrics':
+            response.update(self.metrics())
+            return response
+        try:
+            job = _parse_job(request)
+            priority = int(request.get('priority', 0))
+            timeout = request.get('timeout', self.timeout)
+            timeout = float(timeout) if timeout is not None else None
+        except (KeyError, TypeError, ValueError) as error:
+            response['error'] = f'invalid request: {error}'
+            return response
+
+        if self._queue.qsize() >= self.max_queued:
+            self.counters['rejected'] += 1
+            response['error'] = 'queue full'
+            return response
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        result = asyncio.get_running_loop().create_future()
+        self.counters['submitted'] += 1
+        self._queue.put_nowait((-priority, next(self._sequence), job,
+                                result, deadline))
+        try:
+            if timeout is None:
+                response.update(await result)
+            else:
+                response.update(await asyncio.wait_for(
+                    asyncio.shield(result), timeout + TIMEOUT_GRACE))
+        except asyncio.TimeoutError:
+            # A queued job is skipped once its result is cancelled
+            result.cancel()
+            self.counters['timed_out'] += 1
+            response['error'] = 'timeout'
+            return response
+
+        if 'error' in response:
+            self.counters['failed'] += 1
+        else:
+            self.counters['completed'] += 1
+            self._completions.append(time.monotonic())
+        return response
+
+    def metrics(self):
+        """
+        Returns the queue depth, the running jobs, the job counters and the
+         jobs completed per second over the last THROUGHPUT_WINDOW seconds
+        """
+        now = time.monotonic()
+        while self._completions and self._completions[0] < now - THROUGHPUT_WINDOW:
+            self._completions.popleft()
+        window = min(THROUGHPUT_WINDOW, now - self.started)
+        return {
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'running': self.running,
+            'workers': self.workers,
+            **self.counters,
+            'throughput': round(len(self._completions) / window, 3) if window > 0 else 0.0,
+            'uptime': round(now - self.started, 3),
+        }
+
+    async def handle_connection(self, reader, writer):
+        """
+        Answers the request lines of a connection as their jobs finish, so
+         responses may arrive in a different order than the requests
+        """
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    _write_response(writer, {'error': 'request too long'})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self._answer(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _answer(self, line, writer):
+        """
+        Submits the request of a line and writes the response line
+        """
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('the request is no JSON object')
+        except ValueError as error:
+            response = {'error': f'invalid request: {error}'}
+        else:
+            try:
+                response = await self.submit(request)
+            except Exception as error:  # pylint: disable=broad-except
+                # An unexpected error must not close the connection, other
+                #  requests on it are still running
+                response = {'id': request['id']} if 'id' in request else {}
+                response['error'] = f'internal error: {error!r}'
+        if not writer.is_closing():
+            _write_response(writer, response)
+            await writer.drain()
+
+    async def _dispatch(self):
+        """
+        Hands the queued jobs one by one to a worker process
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, job, result, deadline = await self._queue.get()
+            if result.done():
+                continue
+            time_limit = None
+            if deadline is not None:
+                time_limit = deadline - time.monotonic()
+                if time_limit <= 0:
+                    result.set_exception(asyncio.TimeoutError())
+                    continue
+
+            self.running += 1
+            start = time.perf_counter()
+            try:
+                response = await loop.run_in_executor(self._pool, _run_job, job, time_limit)
+            except Exception as error:  # pylint: disable=broad-except
+                response = {'error': str(error)}
+            finally:
+                self.running -= 1
+            response['elapsed'] = round(time.perf_counter() - start, 6)
+            if not result.done():
+                result.set_result(response)
+
+
+def _parse_job(request):
+    """
+    Returns the operation, cipher, text and key of a request as a tuple that
+     can be sent to a worker, raises KeyError, TypeError or ValueError for
+     invalid requests
+    """
+    operation = request['op']
+    if operation not in OPERATIONS:
+        raise ValueError(f'unknown op {operation!r}')
+    cipher = request['cipher']
+    text = request['text']
+    if not isinstance(text, str):
+        raise TypeError('the text is no string')
+    if operation == 'break':
+        if cipher not in CIPHERS:
+            raise ValueError(f'unknown cipher {cipher!r}')
+        return (operation, cipher, ascii_letters(text), None)
+
+    if cipher not in CRYPTERS:
+        raise ValueError(f'unknown cipher {cipher!r}')
+    key = request['key']
+    if not isinstance(key, str):
+        raise TypeError('the key is no string')
+    key = ascii_letters(key)
+    if not key or (cipher == 'mono' and len(set(key)) != 26):
+        raise ValueError('invalid key')
+    return (operation, cipher, text, key)
+
+
+def _run_job(job, time_limit):
+    """
+    Runs a single job in a worker process, whose pool state is the batch breaker
+    Returns the response fields of the result
+    """
+    operation, cipher, text, key = job
+    if operation == 'break':
+        return worker_state().break_record(text, cipher, time_limit=time_limit)
+    crypter = CRYPTERS[cipher]
+    crypt = crypter.encrypt if operation == 'encrypt' else crypter.decrypt
+    return {'text': crypt(text, key)}
+
+
+def _write_response(writer, response):
+    """
+    Writes a response as one JSON line
+    """
+    writer.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+async def serve(server, socket_path=None, host='127.0.0.1', port=None, metrics_interval=None):
+    """
+    Serves the BreakingServer on a Unix socket or a TCP port until SIGINT or SIGTERM
+    With "metrics_interval" the metrics are written to stderr every that many seconds
+    """
+    await server.start()
+    if socket_path:
+        listener = await asyncio.start_unix_server(server.handle_connection, socket_path,
+                                                   limit=MAX_REQUEST_SIZE)
+    else:
+        listener = await asyncio.start_server(server.handle_connection, host, port,
+                                              limit=MAX_REQUEST_SIZE)
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stopped.set)
+
+    address = socket_path or ':'.join(map(str, listener.sockets[0].getsockname()[:2]))
+    print(f'listening on {address}', file=sys.stderr, flush=True)
+    try:
+        async with listener:
+            while not stopped.is_set():
+                try:
+                    await asyncio.wait_for(stopped.wait(), metrics_interval)
+                except asyncio.TimeoutError:
+                    print(json.dumps(server.metrics()), file=sys.stderr, flush=True)
+    finally:
+        await server.stop()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser()
+    ADDRESS = PARSER.add_mutually_exclusive_group(required=True)
+    ADDRESS.add_argument('--socket', '-u',
+                         help='Listen on this Unix socket.')
+    ADDRESS.add_argument('--port', '-p', type=int,
+                         help='Listen on this TCP port, 0 for any free port.')
+    PARSER.add_argument('--host', default='127.0.0.1',
+                        help='The address of the TCP port, localhost by default.')
+    PARSER.add_argument('--workers', '-w', type=int,
+                        help='The amount of worker processes. Defaults to the CPU count.')
+    PARSER.add_argument('--max-queued', type=int, default=MAX_QUEUED,
+                        help='Reject jobs while this many jobs are waiting.')
+    PARSER.add_argument('--timeout', type=float, default=JOB_TIMEOUT,
+                        help='Seconds a job may take unless the request sets a timeout.')
+    PARSER.add_argument('--metrics', type=float, metavar='SECONDS',
+                        help='Write the metrics to stderr every SECONDS seconds.')
+    PARSER.add_argument('--restarts', '-r', type=int, default=break_mono.RESTARTS,
+                        help='The amount of restarts per monoalphabetic ciphertext.')
+    PARSER.add_argument('--solver', choices=break_mono.SOLVERS, default='hill',
+                        help='The monoalphabetic key search strategy.')
+    PARSER.add_argument('--seed', '-s', type=int,
+                        help='The random seed, for reproducible results.')
+    PARSER.add_argument('--matrix', action='store_true',
+                        help='Score vigenere key bigrams with a matrix product, requires NumPy.')
+    PARSER.add_argument('--refine', action='store_true',
+                        help='Refine vigenere keys with quadgram analysis.')
+    PARSER.add_argument('--model',
+                        help='The prefix of the frequency files of another language, '
+                        'as written by build_model.py.')
+    PARSER.add_argument('--cache', nargs='?', const=CACHE_FILE,
+                        help='Reuse the results of earlier runs stored in this SQLite file.')
+
+    ARGS = vars(PARSER.parse_args())
+
+    BATCH = BatchBreaker(ARGS['restarts'], ARGS['solver'], ARGS['seed'],
+                         None, ARGS['matrix'], ARGS['refine'],
+                         NGramModel.load(model_files(ARGS['model'])) if ARGS['model'] else None,
+                         ResultCache(ARGS['cache']) if ARGS['cache'] else None)
+    SERVER = BreakingServer(BATCH, ARGS['workers'], ARGS['max_queued'], ARGS['timeout'])
+    asyncio.run(serve(SERVER, ARGS['socket'], ARGS['host'], ARGS['port'], ARGS['metrics']))
@@ -0,0 +1,47 @@
+"""
+Module for scoring all 676 key bigrams of a vigenere key position at once
+Requires NumPy
+"""
+
+import string
+import numpy as np
+
+ENCODE_TABLE = bytes.maketrans(string.ascii_lowercase.encode('ascii'), bytes(range(26)))
+
+# SHIFT_INDEX[a * 26 + b, x * 26 + y] is the index of the bigram (x + a, y + b)
+_SHIFTS = np.arange(26)
+SHIFT_INDEX = ((((_SHIFTS[:, None, None, None] + _SHIFTS[None, None, :, None]) % 26) * 26
+                + (_SHIFTS[None, :, None, None] + _SHIFTS[None, None, None, :]) % 26)
+               .reshape(676, 676))
+
+
+class BigramMatrix:
+    """
+    Scores key bigrams with a histogram of ciphertext bigrams per key position.
+    The fitness of the key bigram (a, b) is the dot product of the histogram with
+     the log bigram matrix cyclically shifted by (a, b), computed for all 676 key
+     bigrams in one matrix product. The text is only touched to count the bigrams.
+    """
+
+    def __init__(self, bigrams):
+        """
+        Initializes the scorer with the dense table of 676 log bigram values
+        """
+        bigrams = np.array(bigrams, dtype=np.int64).ravel()
+        self.shifted_bigrams = bigrams[SHIFT_INDEX]
+
+    @staticmethod
+    def histograms(text, key_length):
+        """
+        Counts the bigrams starting at every key position into 676-entry histograms
+        """
+        codes = np.frombuffer(text.encode('ascii').translate(ENCODE_TABLE), dtype=np.uint8)
+        pairs = codes[:-1].astype(np.intp) * 26 + codes[1:]
+        return np.array([np.bincount(pairs[i::key_length], minlength=676)
+                         for i in range(key_length)], dtype=np.int64)
+
+    def fitness(self, histogram):
+        """
+        Returns the fitness of all 676 key bigrams, indexed by a * 26 + b
+        """
+        return self.shifted_bigrams @ histogram
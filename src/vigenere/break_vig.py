@@ -4,14 +4,38 @@ Module for breaking vigenere cyphers
 
 import argparse
 import os
-from math import log
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../common'))
+# pylint: disable=wrong-import-position
+from cli import input_file, open_output, STANDARD_STREAM
+from instrumentation import Stats, DISABLED, PROGRESS_INTERVAL
+from key_length import estimate_key_lengths, MAX_KEY_LENGTH
+from ngram_model import NGramModel, model_files
 from reader import read_ascii_from_file
+from refine import QuadgramRefiner
+from result_cache import ResultCache, result_digest, CACHE_FILE
+from vig import Vigenere
+from worker_pool import process_pool, worker_state
 
 
 MONOGRAM_FILE = os.path.join(os.path.dirname(
     __file__), '../../frequency_files/english_monograms.txt')
 BIGRAM_FILE = os.path.join(os.path.dirname(
     __file__), '../../frequency_files/english_bigrams.txt')
+QUADGRAM_FILE = os.path.join(os.path.dirname(
+    __file__), '../../frequency_files/english_quadgrams.txt')
+KEY_LENGTH_CANDIDATES = 3
+
+def _run_key_length(text, key_length):
+    """
+    Breaks the text with a single key length in a worker process, whose pool
+     state is the breaker
+    Returns the key and the stats dict of the key length, None if disabled
+    """
+    breaker = worker_state()
+    breaker.stats = breaker.stats.spawn()
+    key = breaker.break_vigenere(text, key_length)
+    return (key, breaker.stats.as_dict() if breaker.stats.enabled else None)
 
 
 class VigenereBreaker:  # pylint: disable=too-few-public-methods
@@ -19,46 +43,131 @@ class VigenereBreaker:  # pylint: disable=too-few-public-methods
     Vigenere Cipher Breaker class
     """
 
-    def __init__(self, key_length, monogram_file, bigram_file):
-        self.key_length = key_length
-
-        # Initialize monograms
-        monogram_frequencies = {}
-        with open(monogram_file, 'r', encoding='utf-8') as freq_file:
-            for line in freq_file:
-                key, count = line.split(' ')
-                monogram_frequencies[key.lower()] = int(count)
+    def __init__(self, key_length, monogram_file, bigram_file, matrix=False,
+                 quadgram_file=None, stats=None):  # pylint: disable=too-many-arguments
+        """
+        The key length may be None when only break_vigenere_auto is used
+        With "matrix" set, key bigrams are scored with the NumPy matrix engine
+        With a "quadgram_file", the bigram result is refined with quadgram analysis
+        Statistics are only recorded when instrumentation "stats" are given
+        """
+        stats = stats or DISABLED
+        with stats.phase('load'):
+            # Maps the binary caches of the files, which are rebuilt if outdated
+            files = {1: monogram_file, 2: bigram_file}
+            if quadgram_file:
+                files[4] = quadgram_file
+            model = NGramModel.load(files)
+        self._use_model(model, key_length, matrix, bool(quadgram_file), stats)
+
+    @classmethod
+    def from_model(cls, model, key_length=None, matrix=False, refine=False,
+                   stats=None):  # pylint: disable=too-many-arguments
+        """
+        Initializes the breaker with the tables of an NGramModel, which is shared
+         instead of copied. With "refine" set, the model needs a quadgram table.
+        """
+        breaker = cls.__new__(cls)
+        breaker._use_model(model, key_length, matrix, refine, stats or DISABLED)
+        return breaker
 
-        self.monogram_frequencies = VigenereBreaker._map_to_sorted_list(
-            monogram_frequencies)
+    def _use_model(self, model, key_length, matrix, refine,
+                   stats):  # pylint: disable=too-many-arguments
+        """
+        Sets up the breaker with the tables of the model
+        """
+        self.key_length = key_length
+        self.matrix = matrix
+        self._bigram_matrix = None
+        self.stats = stats
+        self.model = model
+        self.monogram_frequencies = model.letters_by_frequency()
+        self.refine = refine
+        # Results of earlier runs are looked up in this ResultCache, if set
+        self.result_cache = None
+
+    @property
+    def bigrams(self):
+        """
+        Logarithm of the bigram frequencies normalized to integers between 0 and
+         1 000 000, indexed a * 26 + b, a read-only view of the model
+        """
+        return self.model.table(2)
 
-        # Initialize bigrams
-        self.bigram_map = VigenereBreaker._import_bigram_file(bigram_file)
+    @property
+    def refiner(self):
+        """
+        The quadgram refiner, None without refinement
+        """
+        return QuadgramRefiner(self.model.table(4)) if self.refine else None
 
-    def break_vigenere(self, text):
+    def break_vigenere(self, text, key_length=None):
         """
         Attempts to break vignere cipher using bigram analysis
         Tries out all different key bigrams, rating them based on the resulting
           distribution of decyphered bigrams, then picks the best combination of
           those keys
+        Uses the key length of the breaker unless "key_length" is given
         """
+        key_length = key_length or self.key_length
+        digest, key = self._cached_key(text, {'key_length': key_length})
+        if key is not None:
+            return key
+        stats = self.stats
+        stats.count('restarts')
+
+        key_guesses = [['' for i in range(key_length)], [
+            '' for i in range(key_length)]]
+        key_fitness = [0 for i in range(key_length)]
+
+        with stats.phase('climb'):
+            best_pairs = (self._best_pairs_matrix(text, key_length) if self.matrix
+                          else self._best_pairs(text, key_length))
+        stats.count('evaluations', key_length * 26 * 26)
+
+        for i, (best_key, best_fitness) in enumerate(best_pairs):
+            # Insert into appropiate positions in both key guesses to be compared later
+            key_guesses[0][i] = best_key[0]
+            key_guesses[1][(i + 1) % key_length] = best_key[1]
+            key_fitness[i] = best_fitness
 
-        key_guesses = [['' for i in range(self.key_length)], [
-            '' for i in range(self.key_length)]]
-        key_fitness = [0 for i in range(self.key_length)]
+        # Generate final key
+        key = ''
+        for i in range(key_length):
+            key += (key_guesses[0][i] if key_fitness[i] > key_fitness[(i-1) % key_length]
+                    else key_guesses[1][i])
+
+        # Invert key into correct form
+        key = self._invert_key(key)
+
+        # Optional second stage correcting single letters with quadgrams
+        if self.refine:
+            with stats.phase('climb'):
+                key = self.refiner.refine(text, key, stats)
+        if stats.enabled:
+            stats.report(key, self.score_key(text, key))
+        if digest is not None:
+            self.result_cache.put(digest, key, None)
+        return key
+
+    def _best_pairs(self, text, key_length):
+        """
+        Finds the best key bigram and its fitness for every position in the key
+        Reference implementation translating the bigram list for all 676 key bigrams
+        """
+        best_pairs = []
 
         # Split into as many groups as there are letters in the key
-        text_fragments = VigenereBreaker._split_text(self.key_length, text)
+        text_fragments = VigenereBreaker._split_text(key_length, text)
 
         # Iterate through all positions in the key
-        for i in range(self.key_length):
+        for i in range(key_length):
             # Concatenate adjacent text fragments into bigram lists
             bigram_list = [text_fragments[i][c] +
-                           text_fragments[(i+1) % self.key_length][c +
-                                                                   int((i+1) / self.key_length)]
+                           text_fragments[(i+1) % key_length][c + int((i+1) / key_length)]
                            for c in range(min(len(text_fragments[i]),
-                                              len(text_fragments[(i+1) % self.key_length]) -
-                                              int((i+1) / self.key_length)))]
+                                              len(text_fragments[(i+1) % key_length]) -
+                                              int((i+1) / key_length)))]
 
             # Iterate through all possible key snippets for the current bigrams
             best_key = 'aa'
@@ -72,31 +181,123 @@ class VigenereBreaker:  # pylint: disable=too-few-public-methods
                     best_fitness = translated_fitness
                     best_key = key
 
-            # Insert into appropiate positions in both key guesses to be compared later
-            key_guesses[0][i] = best_key[0]
-            key_guesses[1][(i + 1) % self.key_length] = best_key[1]
-            key_fitness[i] = best_fitness
+            best_pairs.append((best_key, best_fitness))
 
-        # Generate final key
-        key = ''
-        for i in range(self.key_length):
-            key += (key_guesses[0][i] if key_fitness[i] > key_fitness[(i-1) % self.key_length]
-                    else key_guesses[1][i])
+        return best_pairs
 
-        # Invert key into correct form
-        return self._invert_key(key)
+    def _best_pairs_matrix(self, text, key_length):
+        """
+        Finds the best key bigram and its fitness for every position in the key
+        Counts the ciphertext bigrams per position once, then scores all 676 key
+         bigrams in one matrix product, requires NumPy
+        """
+        from bigram_matrix import BigramMatrix  # pylint: disable=import-outside-toplevel
+
+        if self._bigram_matrix is None:
+            self._bigram_matrix = BigramMatrix(self.bigrams)
+
+        best_pairs = []
+        for histogram in BigramMatrix.histograms(text, key_length):
+            fitness = self._bigram_matrix.fitness(histogram)
+            # First maximum, like the strict comparison of the reference implementation
+            best = int(fitness.argmax())
+            if fitness[best] > 0:
+                best_pairs.append((chr(best // 26 + 97) + chr(best % 26 + 97), int(fitness[best])))
+            else:
+                best_pairs.append(('aa', 0))
+
+        return best_pairs
+
+    def break_vigenere_auto(self, text, candidates=KEY_LENGTH_CANDIDATES, workers=None,
+                            max_key_length=MAX_KEY_LENGTH):
+        """
+        Breaks the vigenere cipher without a known key length
+        Estimates the most probable key lengths, breaks the text with the top
+         "candidates" of them on a pool of "workers" processes, then picks the key
+         whose decryption has the highest bigram fitness. Keys repeating a shorter
+         key are shortened, so shorter keys win ties.
+        """
+        digest, key = self._cached_key(text, {'candidates': candidates,
+                                              'max_key_length': max_key_length})
+        if key is not None:
+            return key
+        with self.stats.phase('analysis'):
+            key_lengths = [key_length for key_length, _
+                           in estimate_key_lengths(text, max_key_length)[:candidates]]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(key_lengths)))
+
+        if workers == 1:
+            keys = [self.break_vigenere(text, key_length) for key_length in key_lengths]
+        else:
+            with process_pool(workers, self) as pool:
+                keys = []
+                for key, key_length_stats in pool.map(_run_key_length, [text] * len(key_lengths),
+                                                       key_lengths):
+                    keys.append(key)
+                    if key_length_stats:
+                        self.stats.merge(key_length_stats)
+
+        with self.stats.phase('finalize'):
+            keys = [VigenereBreaker._shorten_key(key) for key in keys]
+            key = max(keys, key=lambda key: (self.score_key(text, key), -len(key)))
+        if self.stats.enabled:
+            self.stats.report(key, self.score_key(text, key), force=True)
+        if digest is not None:
+            self.result_cache.put(digest, key, self.score_key(text, key),
+                                  {'key_lengths': key_lengths})
+        return key
+
+    def _cached_key(self, text, params):
+        """
+        Looks up the result of breaking the text with the parameters and the
+         model, matrix and refine settings of the breaker in the result cache
+        Returns the digest and the cached key, the digest is None without a
+         result cache and the key None if it was not found
+        """
+        if self.result_cache is None:
+            return (None, None)
+        digest = result_digest(text, self.model, {
+            'cipher': 'vigenere', 'matrix': self.matrix, 'refine': self.refine, **params})
+        result = self.result_cache.get(digest)
+        if result is None:
+            return (digest, None)
+        self.stats.count('result_cache_hits')
+        return (digest, result['key'])
+
+    def score_key(self, text, key):
+        """
+        Calculate fitness of all bigrams of the text decrypted with the key
+        """
+        plain = Vigenere.decrypt(text, key)
+        fitness = 0
+        bigrams = self.bigrams
+        for i in range(len(plain) - 1):
+            fitness += bigrams[(ord(plain[i]) - 97) * 26 + ord(plain[i + 1]) - 97]
+        return fitness
 
     def _get_fitness(self, bigram_list):
         """
         Calculate fitness of given bigram list based on the logarithmic frequency table
         """
         fitness = 0
+        bigrams = self.bigrams
         for bigram in bigram_list:
-            fitness += self.bigram_map[ord(bigram[0]) -
-                                       97][ord(bigram[1]) - 97]
+            fitness += bigrams[(ord(bigram[0]) - 97) * 26 + ord(bigram[1]) - 97]
 
         return fitness
 
+    @staticmethod
+    def _shorten_key(key):
+        """
+        Returns the shortest key that repeats into the given key
+        """
+        for length in range(1, len(key)):
+            if len(key) % length == 0 and key[:length] * (len(key) // length) == key:
+                return key[:length]
+        return key
+
     @staticmethod
     def _invert_key(key):
         """
@@ -124,37 +325,6 @@ class VigenereBreaker:  # pylint: disable=too-few-public-methods
 
         return new_bigrams
 
-    @staticmethod
-    def _import_bigram_file(file_name):
-        """
-        Imports bigrams from file into 2D array using ASCII - 97 indices
-        """
-        bigram_map = [[1 for i in range(26)] for j in range(26)]
-
-        with open(file_name, 'r', encoding='utf-8') as file:
-            for line in file:
-                key, val = line.split(' ')
-                key = key.lower()
-                bigram_map[ord(key[0]) - 97][ord(key[1]) - 97] = int(val)
-
-        # Calculate logarithm
-        max_log = 0
-        for row, _ in enumerate(bigram_map):
-            for col, _ in enumerate(bigram_map[row]):
-                bigram_map[row][col] = log(bigram_map[row][col])
-                max_log = max(max_log, bigram_map[row][col])
-
-        normalize_factor = 1000000 / max_log
-
-        # Normalize to integers between 0 and 1 000 000
-        for row, _ in enumerate(bigram_map):
-            for col, _ in enumerate(bigram_map[row]):
-                bigram_map[row][col] = int(
-                    bigram_map[row][col] * normalize_factor)
-                max_log = max(max_log, bigram_map[row][col])
-
-        return bigram_map
-
     @staticmethod
     def _split_text(key_len, text):
         """
@@ -166,32 +336,64 @@ class VigenereBreaker:  # pylint: disable=too-few-public-methods
             split_text[c % key_len] += char
         return split_text
 
-    @staticmethod
-    def _map_to_sorted_list(frequency_map):
-        """
-        Returns the elements of a given frequency map, sorted in descending order
-        """
-        return sorted(frequency_map, key=frequency_map.__getitem__, reverse=True)
 
-
-if __name__ == '__main__':
-    # Parse arguments
-    PARSER = argparse.ArgumentParser()
-    PARSER.add_argument('file', metavar='FILE',
-                        help='The input file.')
-    PARSER.add_argument('--keylen', '-k', required=True,
-                        help='The length of the key used.')
-    PARSER.add_argument('--out', '-o',
+def main(argv=None, prog=None):
+    """
+    Breaks the file given on the command line "argv" and writes the key
+    """
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument('file', metavar='FILE', nargs='?', default=STANDARD_STREAM,
+                        help='The input file, - or none for stdin.')
+    parser.add_argument('--keylen', '-k', type=int,
+                        help='The length of the key used. Estimated if not given.')
+    parser.add_argument('--candidates', '-c', type=int, default=KEY_LENGTH_CANDIDATES,
+                        help='The amount of estimated key lengths to try without --keylen.')
+    parser.add_argument('--workers', '-w', type=int,
+                        help='The amount of worker processes trying key lengths. '
+                        'Defaults to the CPU count.')
+    parser.add_argument('--out', '-o',
                         help='The output file.')
+    parser.add_argument('--matrix', action='store_true',
+                        help='Score all key bigrams at once with a matrix product, requires NumPy.')
+    parser.add_argument('--refine', action='store_true',
+                        help='Refine the key with quadgram analysis.')
+    parser.add_argument('--model',
+                        help='The prefix of the frequency files of another language, '
+                        'as written by build_model.py.')
+    parser.add_argument('--cache', nargs='?', const=CACHE_FILE,
+                        help='Reuse the results of earlier runs stored in this SQLite file.')
+    parser.add_argument('--stats',
+                        help='Write counters and phase times as JSON to this file.')
+    parser.add_argument('--progress', type=float, nargs='?', const=PROGRESS_INTERVAL,
+                        help='Print the best key to stderr every PROGRESS seconds.')
+
+    args = vars(parser.parse_args(argv))
+
+    stats = None
+    if args['stats'] or args['progress'] is not None:
+        stats = Stats(progress=(lambda key, score: print(key, score, file=sys.stderr))
+                      if args['progress'] is not None else None,
+                      interval=args['progress'] or 0)
+
+    files = (model_files(args['model']) if args['model']
+             else {1: MONOGRAM_FILE, 2: BIGRAM_FILE, 4: QUADGRAM_FILE})
+    breaker = VigenereBreaker(args['keylen'], files[1], files[2], args['matrix'],
+                              files[4] if args['refine'] else None, stats)
+    if args['cache']:
+        breaker.result_cache = ResultCache(args['cache'])
+    text = read_ascii_from_file(input_file(args['file']))
+    if args['keylen']:
+        key = breaker.break_vigenere(text)
+    else:
+        key = breaker.break_vigenere_auto(text, args['candidates'], args['workers'])
 
-    ARGS = vars(PARSER.parse_args())
+    with breaker.stats.phase('finalize'):
+        with open_output(args['out']) as out:
+            out.write(key)
 
-    BREAKER = VigenereBreaker(int(ARGS['keylen']), MONOGRAM_FILE, BIGRAM_FILE)
-    TEXT = BREAKER.break_vigenere(read_ascii_from_file(ARGS['file']))
+    if args['stats']:
+        stats.write(args['stats'])
 
-    if ARGS['out']:
-        FILE = open(ARGS['out'], 'w')
-        FILE.write(TEXT)
-        FILE.close()
-    else:
-        print(TEXT)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Module for estimating the key length of vigenere cyphers
+Combines the index of coincidence of the columns with the Kasiski examination
+"""
+
+from collections import Counter, defaultdict
+
+MAX_KEY_LENGTH = 20
+ENGLISH_IOC = 0.0667
+RANDOM_IOC = 1 / 26
+KASISKI_N_GRAM_SIZE = 3
+
+
+def column_ioc(text, key_length):
+    """
+    Average index of coincidence of the key_length columns of the text
+    Every column is sliced out and counted at once, instead of letter by letter
+    """
+    total = 0
+    for i in range(key_length):
+        column = text[i::key_length]
+        length = len(column)
+        if length > 1:
+            total += sum(count * (count - 1) for count in Counter(column).values()) / \
+                (length * (length - 1))
+    return total / key_length
+
+
+def column_iocs(text, max_key_length=MAX_KEY_LENGTH):
+    """
+    Column indices of coincidence of the key lengths from 1 to max_key_length,
+     by key length. Key lengths leaving columns of a single letter are left out.
+    """
+    max_key_length = max(1, min(max_key_length, len(text) // 2))
+    return {key_length: column_ioc(text, key_length)
+            for key_length in range(1, max_key_length + 1)}
+
+
+def repeat_distances(text):
+    """
+    Distances between consecutive occurrences of repeated trigrams
+    Trigrams are indexed with a rolling hash of the letter codes
+    """
+    positions = defaultdict(list)
+    modulus = 26 ** KASISKI_N_GRAM_SIZE
+    rolling_hash = 0
+    for i, letter in enumerate(text):
+        rolling_hash = (rolling_hash * 26 + ord(letter) - 97) % modulus
+        if i >= KASISKI_N_GRAM_SIZE - 1:
+            positions[rolling_hash].append(i)
+
+    distances = []
+    for occurrences in positions.values():
+        for first, second in zip(occurrences, occurrences[1:]):
+            distances.append(second - first)
+    return distances
+
+
+def estimate_key_lengths(text, max_key_length=MAX_KEY_LENGTH, iocs=None):
+    """
+    Returns the candidate key lengths from 1 to max_key_length, most probable first,
+     as (key length, confidence) pairs.
+    The confidence is the column index of coincidence, scaled from 0 for random
+     text to 1 for english text, times the share of Kasiski repeat distances
+     divisible by the key length. Multiples of the key length reach a similar
+     index of coincidence but fewer divisible distances, divisors of the key length
+     many divisible distances but a lower index of coincidence.
+    The column indices of coincidence "iocs" of column_iocs are computed unless given.
+    """
+    if iocs is None:
+        iocs = column_iocs(text, max_key_length)
+    distances = repeat_distances(text)
+
+    candidates = []
+    for key_length, ioc in iocs.items():
+        ioc_score = (ioc - RANDOM_IOC) / (ENGLISH_IOC - RANDOM_IOC)
+        ioc_score = min(1.0, max(0.0, ioc_score))
+        if distances:
+            kasiski_score = sum(1 for distance in distances
+                                if distance % key_length == 0) / len(distances)
+        else:
+            kasiski_score = 1.0
+        candidates.append((key_length, ioc_score * kasiski_score))
+
+    # Most confident first, shorter key lengths first on ties
+    candidates.sort(key=lambda candidate: (-candidate[1], candidate[0]))
+    return candidates
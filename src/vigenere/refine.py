@@ -0,0 +1,89 @@
+"""
+Module for refining vigenere keys with quadgram analysis
+"""
+
+import string
+from instrumentation import DISABLED
+
+N_GRAM_SIZE = 4
+MAX_SWEEPS = 10
+
+
+class QuadgramRefiner:  # pylint: disable=too-few-public-methods
+    """
+    Improves a vigenere key by coordinate ascent:
+    Every key position in turn is set to the shift giving the best quadgram score,
+     until a sweep over all positions changes nothing.
+    Changing a key position only changes the letters of its column, so only the
+     quadgrams covering that column are rescored.
+    """
+
+    def __init__(self, quadgram_table):
+        """
+        Initializes the refiner with a dense table of 26^4 logarithmic quadgram values
+        """
+        self.table = quadgram_table
+
+    def refine(self, text, key, stats=DISABLED):
+        """
+        Returns the refined key, in the form used by vig.py
+        The scored key shifts are counted as evaluations of the instrumentation "stats"
+        """
+        key_length = len(key)
+        cipher = [ord(letter) - 97 for letter in text]
+        shifts = [ord(letter) - 97 for letter in key.lower()]
+        plain = [(code - shifts[i % key_length]) % 26 for i, code in enumerate(cipher)]
+
+        # Start positions of all quadgrams covering a column
+        last_start = len(cipher) - N_GRAM_SIZE
+        column_starts = []
+        for column in range(key_length):
+            starts = set()
+            for i in range(column, len(cipher), key_length):
+                starts.update(range(max(0, i - N_GRAM_SIZE + 1), min(i, last_start) + 1))
+            column_starts.append(sorted(starts))
+
+        evaluations = 0
+        for _ in range(MAX_SWEEPS):
+            changed = False
+            for column in range(key_length):
+                best_shift = shifts[column]
+                best_score = self._score_starts(plain, column_starts[column])
+                for shift in range(26):
+                    if shift == shifts[column]:
+                        continue
+                    self._set_shift(plain, cipher, column, key_length, shift)
+                    evaluations += 1
+                    score = self._score_starts(plain, column_starts[column])
+                    if score > best_score:
+                        best_shift, best_score = shift, score
+
+                self._set_shift(plain, cipher, column, key_length, best_shift)
+                if best_shift != shifts[column]:
+                    shifts[column] = best_shift
+                    changed = True
+                    stats.count('accepted_swaps')
+            if not changed:
+                break
+
+        stats.count('evaluations', evaluations)
+        return ''.join(string.ascii_lowercase[shift] for shift in shifts)
+
+    @staticmethod
+    def _set_shift(plain, cipher, column, key_length, shift):
+        """
+        Deciphers one column of the text with the given shift
+        """
+        for i in range(column, len(cipher), key_length):
+            plain[i] = (cipher[i] - shift) % 26
+
+    def _score_starts(self, plain, starts):
+        """
+        Sums the quadgram scores of the given start positions
+        """
+        score = 0
+        table = self.table
+        for i in starts:
+            score += table[((plain[i] * 26 + plain[i + 1]) * 26 + plain[i + 2]) * 26
+                           + plain[i + 3]]
+        return score
@@ -2,14 +2,28 @@
 Vigenere encryption and decryption module
 """
 
-import argparse
+import os
+import re
 import string
-from reader import read_ascii_from_file
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../common'))
+# pylint: disable=wrong-import-position
+from cli import crypt_main
+from reader import iter_ascii_chunks
+
+NON_LETTERS = re.compile('([^a-z]+)')
+# Translation tables shifting lowercase letters by 0..25
+SHIFT_TABLES = [bytes.maketrans(string.ascii_lowercase.encode('ascii'),
+                                (string.ascii_lowercase[shift:] +
+                                 string.ascii_lowercase[:shift]).encode('ascii'))
+                for shift in range(26)]
 
 
 class Vigenere:
     """
     Class implementing encryption and decryption of vigenere cyphers
+    Letters are shifted per key phase: all letters using the same key letter are
+     translated at once with bytes.translate
     """
 
     @staticmethod
@@ -22,66 +36,93 @@ class Vigenere:
             shifts.append(string.ascii_lowercase.index(letter.lower()))
         return shifts
 
+    @staticmethod
+    def shift_letters(letters, shifts, phase=0):
+        """
+        Shifts a text of lowercase letters only, the first letter using key shift "phase"
+        """
+        data = letters.encode('ascii')
+        result = bytearray(data)
+        for i, shift in enumerate(shifts):
+            start = (i - phase) % len(shifts)
+            result[start::len(shifts)] = data[start::len(shifts)].translate(SHIFT_TABLES[shift])
+        return result.decode('ascii')
+
+    @staticmethod
+    def shift_text(text, shifts):
+        """
+        Shifts the letters of the text, other characters are kept and do not
+         advance the key
+        """
+        text = text.lower()
+        runs = NON_LETTERS.split(text)
+        letters = Vigenere.shift_letters(''.join(runs[::2]), shifts)
+        if len(runs) == 1:
+            return letters
+
+        # Put the non-letter runs back between the shifted letter runs
+        position = 0
+        for i in range(0, len(runs), 2):
+            length = len(runs[i])
+            runs[i] = letters[position:position + length]
+            position += length
+        return ''.join(runs)
+
     @staticmethod
     def encrypt(text, key):
         """
         Encrypts the vigenere cypher
         """
         # create an array with number of shifts extracted from passed key
-        key_shifts = Vigenere.text_to_numbers(key)
-
-        result = ''
-        key_pos = 0
-        for letter in text.lower():
-            if letter in string.ascii_lowercase:
-                # shift letter
-                index = string.ascii_lowercase.index(letter)
-                index = (index + key_shifts[key_pos]) % 26
-                result += string.ascii_lowercase[index]
-
-                # move key_pos
-                key_pos = (key_pos + 1) % len(key)
-            else:
-                result += letter
-        return result
+        return Vigenere.shift_text(text, Vigenere.text_to_numbers(key))
 
     @staticmethod
     def decrypt(text, key):
         """
-        Decrypts the cigenere cypher
+        Decrypts the vigenere cypher
         """
-        key_shifts = Vigenere.text_to_numbers(key)
-        decrypt_key = [string.ascii_letters[26 - shift]
-                       for shift in key_shifts]
-        return Vigenere.encrypt(text, decrypt_key)
+        return Vigenere.shift_text(text, Vigenere._decrypt_shifts(key))
 
+    @staticmethod
+    def encrypt_file(file, out, key):
+        """
+        Encrypts the alphabetic characters of a file chunk by chunk and writes
+         them to the text stream "out", without loading the file whole
+        """
+        Vigenere._shift_file(file, out, Vigenere.text_to_numbers(key))
 
-PARSER = argparse.ArgumentParser()
-CRYPT = PARSER.add_mutually_exclusive_group(required=True)
+    @staticmethod
+    def decrypt_file(file, out, key):
+        """
+        Decrypts the alphabetic characters of a file chunk by chunk and writes
+         them to the text stream "out", without loading the file whole
+        """
+        Vigenere._shift_file(file, out, Vigenere._decrypt_shifts(key))
+
+    @staticmethod
+    def _decrypt_shifts(key):
+        """
+        Returns the shifts reverting the shifts of the key
+        """
+        return [(26 - shift) % 26 for shift in Vigenere.text_to_numbers(key)]
 
-CRYPT.add_argument('--encrypt', '-e', metavar='KEY',
-                   help='specify encryption key.')
-CRYPT.add_argument('--decrypt', '-d', metavar='KEY',
-                   help='specify decryption key.')
+    @staticmethod
+    def _shift_file(file, out, shifts):
+        """
+        Shifts the file chunk by chunk, carrying the key phase across chunk boundaries
+        """
+        phase = 0
+        for chunk in iter_ascii_chunks(file):
+            out.write(Vigenere.shift_letters(chunk, shifts, phase))
+            phase = (phase + len(chunk)) % len(shifts)
 
-PARSER.add_argument('file', metavar='FILE',
-                    help='the input file.')
-PARSER.add_argument('--out', '-o',
-                    help='The output file.')
 
-ARGS = vars(PARSER.parse_args())
+def main(argv=None, prog=None, mode=None):
+    """
+    Encrypts or decrypts the file given on the command line "argv", see crypt_main
+    """
+    crypt_main(Vigenere, argv, prog, mode)
 
-TEXT = ''
-if ARGS['encrypt']:
-    TEXT = Vigenere.encrypt(read_ascii_from_file(
-        ARGS['file']), ARGS['encrypt'])
-elif ARGS['decrypt']:
-    TEXT = Vigenere.decrypt(read_ascii_from_file(
-        ARGS['file']), ARGS['decrypt'])
 
-if ARGS['out']:
-    FILE = open(ARGS['out'], 'w')
-    FILE.write(TEXT)
-    FILE.close()
-else:
-    print(TEXT)
+if __name__ == '__main__':
+    main()